@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from app.core.config import settings
 from app.db.base import Base
+import app.db.models  # noqa: F401  registers the models on Base.metadata
 
 config = context.config
 if config.config_file_name is not None:
@@ -0,0 +1,53 @@
+"""add_order_indexes
+
+Revision ID: aea01d75303b
+Revises: 16b575912a28
+Create Date: 2026-10-18 10:00:41.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'aea01d75303b'
+down_revision: Union[str, None] = '16b575912a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, but keeps orders writable while building
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_user_id_created_at_id',
+            'orders',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_orders_active_created_at',
+            'orders',
+            ['created_at'],
+            postgresql_where=sa.text("status IN ('PENDING', 'PAID')"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_orders_active_created_at',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_orders_user_id_created_at_id',
+            table_name='orders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
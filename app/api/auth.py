@@ -9,6 +9,7 @@ from app.core.limiter import limiter
 from app.core.security import create_access_token
 from app.db.base import get_db_session
 from app.db.repositories.user_repository import UserRepository
+from app.db.routing import pin_to_primary
 from app.schemas.auth import Token, UserCreate, UserResponse
 from app.services.auth_service import authenticate_user, register_user
 
@@ -30,6 +31,8 @@ async def register(
             detail="Email already registered",
         )
     user = await register_user(repository, body.email, body.password)
+    # the new user's first authenticated requests must find them
+    await pin_to_primary(user.id)
     return UserResponse.model_validate(user)
 
 
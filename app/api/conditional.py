@@ -0,0 +1,42 @@
+import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+
+
+def weak_etag(version: int) -> str:
+    # weak: the tag follows the row version, not the exact bytes of the representation
+    return f'W/"{version}"'
+
+
+def http_date(value: datetime.datetime) -> str:
+    return format_datetime(value.astimezone(datetime.UTC), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: datetime.datetime) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        # clients may keep the body but have to revalidate it on every use
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime.datetime) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110, 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.UTC)
+    # HTTP dates have whole-second precision
+    return last_modified.replace(microsecond=0) <= since
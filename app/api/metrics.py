@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+
+from app.cache.stats import get_cache_stats
+from app.core.config import settings
+from app.core.dependencies import require_metrics_token
+from app.db.base import engine
+from app.tasks.queue_depth import get_queue_depth
+
+router = APIRouter(dependencies=[Depends(require_metrics_token)])
+
+
+@router.get("/cache/")
+async def cache_metrics() -> dict:
+    return get_cache_stats()
+
+
+@router.get("/db/")
+async def db_metrics() -> dict:
+    return engine.pool.stats()
+
+
+@router.get("/tasks/")
+async def task_metrics() -> dict:
+    return {"queue": settings.taskiq_queue_name, "depth": await get_queue_depth()}
@@ -1,76 +1,173 @@
+from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.cache.decorators import invalidate_cache
+from app.api.conditional import is_not_modified, validator_headers, weak_etag
+from app.api.responses import OrjsonResponse
 from app.core.limiter import limiter
-from app.kafka.producer import send_new_order_event
 from app.core.dependencies import get_current_user
 from app.db.base import get_db_session
-from app.db.models import User
 from app.db.repositories.order_repository import OrderRepository
+from app.db.repositories.outbox_repository import OutboxRepository
+from app.db.routing import get_read_db_session, pin_to_primary
+from app.events.order_status import get_order_status_hub, stream_order_status
 from app.core.config import settings
-from app.schemas.order import OrderCreate, OrderResponse, OrderUpdate
+from app.schemas.auth import UserResponse
+from app.schemas.order import (
+    OrderBatchLookup,
+    OrderBatchResponse,
+    OrderBulkCreate,
+    OrderCreate,
+    OrderResponse,
+    OrderUpdate,
+)
 from app.services import order_service
 
 router = APIRouter()
 
 
+def _check_order_access(order: dict | None, current_user: UserResponse) -> None:
+    # order is the cached order or its rendered-mode meta record; both carry user_id
+    if order is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    if order["user_id"] != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot access this order")
+
+
 @router.post("/", response_model=OrderResponse)
 @limiter.limit(settings.rate_limit_default)
 async def create_order(
     request: Request,
     body: OrderCreate,
     session: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ) -> OrderResponse:
     repository = OrderRepository(session)
     order = await order_service.create_order(
         repository,
+        OutboxRepository(session),
         user_id=current_user.id,
         order_data=body,
     )
-    await send_new_order_event(order.id, current_user.id)
+    await session.commit()
+    await order_service.announce_new_orders([order])
+    await pin_to_primary(current_user.id)
     return OrderResponse.model_validate(order)
 
 
+@router.post("/bulk/", response_model=list[OrderResponse])
+@limiter.limit(settings.rate_limit_default)
+async def create_orders_bulk(
+    request: Request,
+    body: OrderBulkCreate,
+    session: AsyncSession = Depends(get_db_session),
+    current_user: UserResponse = Depends(get_current_user),
+) -> list[OrderResponse]:
+    orders = await order_service.create_orders_bulk(
+        OrderRepository(session),
+        OutboxRepository(session),
+        user_id=current_user.id,
+        bulk_data=body,
+    )
+    await session.commit()
+    await order_service.announce_new_orders(orders)
+    await pin_to_primary(current_user.id)
+    return [OrderResponse.model_validate(o) for o in orders]
+
+
+@router.post("/batch/", response_model=OrderBatchResponse)
+@limiter.limit(settings.rate_limit_default)
+async def get_orders_batch(
+    request: Request,
+    body: OrderBatchLookup,
+    session: AsyncSession = Depends(get_read_db_session),
+    current_user: UserResponse = Depends(get_current_user),
+) -> Response:
+    order_ids = list(dict.fromkeys(body.ids))
+    found = await order_service.get_orders(order_ids, session)
+    # all or nothing: one foreign id fails the whole batch, nothing is returned
+    if any(order["user_id"] != current_user.id for order in found.values()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot access these orders")
+    return OrjsonResponse(
+        {
+            "orders": [found[order_id] for order_id in order_ids if order_id in found],
+            "missing": [order_id for order_id in order_ids if order_id not in found],
+        }
+    )
+
+
+@router.get("/events/")
+@limiter.limit(settings.rate_limit_default)
+async def order_status_events(
+    request: Request,
+    session: AsyncSession = Depends(get_read_db_session),
+    current_user: UserResponse = Depends(get_current_user),
+) -> StreamingResponse:
+    # the stream may stay open for hours; don't keep a pooled connection from the principal lookup
+    await session.close()
+    return StreamingResponse(
+        stream_order_status(
+            get_order_status_hub(), current_user.id, settings.order_events_heartbeat_interval
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{order_id}/", response_model=OrderResponse)
 @limiter.limit(settings.rate_limit_default)
 async def get_order(
     request: Request,
     order_id: UUID,
-    session: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_user),
-) -> OrderResponse:
-    response = await order_service.get_order(order_id, session)
-    if response is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    if response.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot access this order")
-    return response
+    session: AsyncSession = Depends(get_read_db_session),
+    current_user: UserResponse = Depends(get_current_user),
+) -> Response:
+    if settings.order_cache_rendered:
+        rendered = await order_service.get_order_rendered(order_id, session)
+        order = rendered.meta if rendered is not None else None
+    else:
+        order = await order_service.get_order(order_id, session)
+    _check_order_access(order, current_user)
+    # a polling client that already has this version gets an empty 304, usually straight from cache
+    updated_at = datetime.fromisoformat(order["updated_at"])
+    headers = validator_headers(weak_etag(order["version"]), updated_at)
+    if is_not_modified(request, headers["ETag"], updated_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if settings.order_cache_rendered:
+        return Response(rendered.body, media_type="application/json", headers=headers)
+    return OrjsonResponse(order, headers=headers)
 
 
 @router.patch("/{order_id}/", response_model=OrderResponse)
 @limiter.limit(settings.rate_limit_default)
 async def update_order(
     request: Request,
+    response: Response,
     order_id: UUID,
     body: OrderUpdate,
     session: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
 ) -> OrderResponse:
-    order = await order_service.get_order(order_id, session)
-    if order is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    if order.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot access this order")
-    
+    if settings.order_cache_rendered:
+        rendered = await order_service.get_order_rendered(order_id, session)
+        order = rendered.meta if rendered is not None else None
+    else:
+        order = await order_service.get_order(order_id, session)
+    _check_order_access(order, current_user)
+
     repository = OrderRepository(session)
     updated = await order_service.update_order_status(repository, order_id, body.status)
     if updated is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    await invalidate_cache(f"order:{order_id}")
+    # committed before the cache and the event streams see the new version: a write-through of
+    # an update that then rolls back would outrank every refill of the real row until it expires
+    await session.commit()
+    await order_service.announce_order_update(updated)
+    await pin_to_primary(current_user.id)
+    response.headers.update(validator_headers(weak_etag(updated.version), updated.updated_at))
     return OrderResponse.model_validate(updated)
 
 
@@ -78,12 +175,30 @@ async def update_order(
 @limiter.limit(settings.rate_limit_default)
 async def get_orders_by_user(
     request: Request,
+    response: Response,
     user_id: int,
-    session: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_user),
-) -> list[OrderResponse]:
+    limit: int = Query(
+        order_service.ORDERS_PAGE_DEFAULT_LIMIT, ge=1, le=order_service.ORDERS_PAGE_MAX_LIMIT
+    ),
+    cursor: str | None = None,
+    stream: bool = False,
+    session: AsyncSession = Depends(get_read_db_session),
+    current_user: UserResponse = Depends(get_current_user),
+) -> list[OrderResponse] | StreamingResponse:
     if user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your orders")
     repository = OrderRepository(session)
-    orders = await order_service.get_orders_by_user_id(repository, user_id)
+    if stream:
+        return StreamingResponse(
+            order_service.stream_orders_by_user_id(repository, user_id),
+            media_type="application/x-ndjson",
+        )
+    try:
+        orders, next_cursor = await order_service.get_orders_by_user_id(
+            repository, user_id, limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [OrderResponse.model_validate(o) for o in orders]
@@ -0,0 +1,11 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class OrjsonResponse(JSONResponse):
+    # for endpoints that already hold JSON-ready data (cache hits). Don't make it the default
+    # response class: routes with a response_model are dumped by pydantic-core, which is as fast
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
@@ -1,6 +1,13 @@
+from unittest.mock import patch
+
 import pytest
 from httpx import AsyncClient
 
+from app.core import security
+from app.core.config import settings
+from app.db.repositories.user_repository import UserRepository
+from app.services.auth_service import invalidate_user_cache
+
 pytestmark = pytest.mark.asyncio
 
 
@@ -62,3 +69,37 @@ async def test_token_invalid(client: AsyncClient):
         data={"username": "nonexistent@example.com", "password": "wrong"},
     )
     assert resp.status_code == 401
+
+
+async def test_authenticated_user_lookup_is_cached(client: AsyncClient, test_user, auth_headers):
+    await invalidate_user_cache(test_user.id)
+    with patch.object(
+        UserRepository, "get_by_id", autospec=True, side_effect=UserRepository.get_by_id
+    ) as get_by_id:
+        for _ in range(3):
+            resp = await client.get(f"/orders/user/{test_user.id}/", headers=auth_headers)
+            assert resp.status_code == 200
+        assert get_by_id.call_count == 1
+
+        await invalidate_user_cache(test_user.id)
+        await client.get(f"/orders/user/{test_user.id}/", headers=auth_headers)
+        assert get_by_id.call_count == 2
+
+
+async def test_token_returns_503_when_password_hashing_is_saturated(client: AsyncClient, monkeypatch):
+    await client.post("/register/", json={"email": "busy@example.com", "password": "secret123"})
+    monkeypatch.setattr(settings, "password_hash_workers", 1)
+    monkeypatch.setattr(settings, "password_hash_max_pending", 0)
+    monkeypatch.setattr(settings, "password_hash_queue_timeout", 0.05)
+    security.shutdown_password_executor()
+    slots = security._get_password_slots()
+    # another login holds the only slot for longer than the queue timeout
+    await slots.acquire()
+    try:
+        resp = await client.post("/token/", data={"username": "busy@example.com", "password": "secret123"})
+    finally:
+        slots.release()
+        security.shutdown_password_executor()
+
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
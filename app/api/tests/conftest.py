@@ -1,46 +1,22 @@
-from collections.abc import AsyncGenerator
 from unittest.mock import AsyncMock, patch
 
 import pytest
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache.local import get_local_cache
 from app.core.security import create_access_token
-from app.db.base import Base, get_db_session
+from app.db.base import get_db_session
 from app.db.models import User
 from app.main import app
 
-import os
 
-TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
-
-
-@pytest.fixture
-async def db_engine():
-    engine = create_async_engine(
-        TEST_DATABASE_URL,
-        echo=False,
-        pool_pre_ping=True,
-    )
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
-    yield engine
-    await engine.dispose()
-
-
-@pytest.fixture
-async def db_session(db_engine) -> AsyncGenerator[AsyncSession, None]:
-    factory = async_sessionmaker(
-        db_engine,
-        class_=AsyncSession,
-        expire_on_commit=False,
-        autocommit=False,
-        autoflush=False,
-    )
-    async with factory() as session:
-        yield session
-        await session.rollback()
+@pytest.fixture(autouse=True)
+def clear_local_cache():
+    # ids restart in every test database, so cached principals must not leak between tests
+    get_local_cache().clear()
+    yield
+    get_local_cache().clear()
 
 
 @pytest.fixture
@@ -52,7 +28,6 @@ async def client(db_session: AsyncSession):
     with (
         patch("app.kafka.producer.get_kafka_producer", new_callable=AsyncMock),
         patch("app.kafka.producer.close_kafka_producer", new_callable=AsyncMock),
-        patch("app.api.orders.send_new_order_event", new_callable=AsyncMock),
     ):
         async with AsyncClient(
             transport=ASGITransport(app=app),
@@ -71,7 +46,7 @@ async def test_user(db_session: AsyncSession):
         password=get_password_hash("password123"),
     )
     db_session.add(user)
-    await db_session.flush()
+    await db_session.commit()
     await db_session.refresh(user)
     return user
 
@@ -0,0 +1,43 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+
+pytestmark = pytest.mark.asyncio
+
+METRICS_HEADERS = {"X-Metrics-Token": "metrics-secret"}
+
+
+@pytest.fixture(autouse=True)
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "metrics-secret")
+
+
+async def test_cache_metrics(client: AsyncClient):
+    resp = await client.get("/metrics/cache/", headers=METRICS_HEADERS)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert set(data) == {"local", "redis"}
+    assert {"hits", "misses", "hit_ratio"} <= set(data["local"])
+
+
+async def test_db_metrics(client: AsyncClient):
+    resp = await client.get("/metrics/db/", headers=METRICS_HEADERS)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert {"size", "checked_out", "overflow", "checkouts", "timeouts", "avg_wait_ms", "max_wait_ms"} <= set(data)
+
+
+async def test_task_metrics(client: AsyncClient):
+    resp = await client.get("/metrics/tasks/", headers=METRICS_HEADERS)
+    assert resp.status_code == 200
+    assert set(resp.json()) == {"queue", "depth"}
+
+
+@pytest.mark.parametrize("path", ["/metrics/cache/", "/metrics/db/", "/metrics/tasks/"])
+async def test_metrics_require_token(client: AsyncClient, monkeypatch, path):
+    assert (await client.get(path)).status_code == 403
+    assert (await client.get(path, headers={"X-Metrics-Token": "wrong"})).status_code == 403
+
+    monkeypatch.setattr(settings, "metrics_token", None)
+    assert (await client.get(path, headers=METRICS_HEADERS)).status_code == 404
@@ -1,5 +1,17 @@
+import json
+import uuid
+from unittest.mock import AsyncMock, patch
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event, select
+
+from app.cache.decorators import get_cache
+from app.cache.local import get_local_cache
+from app.core.config import settings
+from app.db.base import detached_engine
+from app.db.models import OutboxEvent
+from app.services import order_service
 
 pytestmark = pytest.mark.asyncio
 
@@ -77,6 +89,19 @@ async def test_create_order(client: AsyncClient, auth_headers):
     assert "id" in data
 
 
+async def test_create_order_announced_only_after_commit(client: AsyncClient, auth_headers, db_session):
+    with (
+        patch.object(db_session, "commit", new_callable=AsyncMock, side_effect=ConnectionError),
+        patch.object(order_service.get_order, "prime", new_callable=AsyncMock) as prime,
+        patch("app.services.order_service.remember_order_ids", new_callable=AsyncMock) as remember,
+        pytest.raises(ConnectionError),
+    ):
+        await client.post("/orders/", json={"items": []}, headers=auth_headers)
+
+    prime.assert_not_awaited()
+    remember.assert_not_awaited()
+
+
 async def test_create_order_unauthorized(client: AsyncClient):
     resp = await client.post(
         "/orders/",
@@ -97,6 +122,27 @@ async def test_get_order(client: AsyncClient, test_user, auth_headers):
     assert resp.json()["id"] == order_id
 
 
+async def test_get_order_ignores_entries_cached_by_an_older_deploy(client: AsyncClient, test_user, auth_headers):
+    create_resp = await client.post(
+        "/orders/",
+        json={"items": [{"name": "x", "quantity": 1, "price": 5.0}]},
+        headers=auth_headers,
+    )
+    order = create_resp.json()
+    # the shape orders were cached in before version and updated_at were added
+    legacy = {key: value for key, value in order.items() if key not in ("version", "updated_at")}
+    await get_cache().set(f"order:{order['id']}", legacy)
+    get_local_cache().clear()
+
+    try:
+        resp = await client.get(f"/orders/{order['id']}/", headers=auth_headers)
+    finally:
+        await get_cache().delete(f"order:{order['id']}")
+
+    assert resp.status_code == 200
+    assert resp.json()["version"] == order["version"]
+
+
 async def test_get_order_forbidden(client: AsyncClient, auth_headers, registered_user):
     create_resp = await client.post(
         "/orders/",
@@ -124,6 +170,23 @@ async def test_patch_order(client: AsyncClient, auth_headers):
     assert resp.json()["status"] == "PAID"
 
 
+async def test_patch_order_not_cached_when_commit_fails(client: AsyncClient, auth_headers, db_session):
+    create_resp = await client.post("/orders/", json={"items": []}, headers=auth_headers)
+    order_id = create_resp.json()["id"]
+
+    with (
+        patch.object(db_session, "commit", new_callable=AsyncMock, side_effect=ConnectionError),
+        patch.object(order_service.get_order, "write_through", new_callable=AsyncMock) as write_through,
+        pytest.raises(ConnectionError),
+    ):
+        await client.patch(f"/orders/{order_id}/", json={"status": "PAID"}, headers=auth_headers)
+    await db_session.rollback()
+
+    write_through.assert_not_awaited()
+    resp = await client.get(f"/orders/{order_id}/", headers=auth_headers)
+    assert resp.json()["status"] == "PENDING"
+
+
 async def test_get_orders_by_user(client: AsyncClient, test_user, auth_headers):
     resp = await client.get(
         f"/orders/user/{test_user.id}/",
@@ -136,3 +199,266 @@ async def test_get_orders_by_user(client: AsyncClient, test_user, auth_headers):
 async def test_get_orders_by_user_forbidden(client: AsyncClient, auth_headers):
     resp = await client.get("/orders/user/99999/", headers=auth_headers)
     assert resp.status_code == 403
+
+
+async def test_get_orders_by_user_paginated(client: AsyncClient, test_user, auth_headers):
+    for _ in range(3):
+        await client.post(
+            "/orders/",
+            json={"items": [{"name": "item", "quantity": 1, "price": 1.0}]},
+            headers=auth_headers,
+        )
+    first = await client.get(
+        f"/orders/user/{test_user.id}/", params={"limit": 2}, headers=auth_headers
+    )
+    assert first.status_code == 200
+    assert len(first.json()) == 2
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = await client.get(
+        f"/orders/user/{test_user.id}/",
+        params={"limit": 2, "cursor": cursor},
+        headers=auth_headers,
+    )
+    assert second.status_code == 200
+    assert len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
+    seen = {o["id"] for o in first.json()} | {o["id"] for o in second.json()}
+    assert len(seen) == 3
+
+
+async def test_get_orders_by_user_invalid_cursor(client: AsyncClient, test_user, auth_headers):
+    resp = await client.get(
+        f"/orders/user/{test_user.id}/", params={"cursor": "garbage"}, headers=auth_headers
+    )
+    assert resp.status_code == 400
+
+
+async def test_get_orders_by_user_stream(client: AsyncClient, test_user, auth_headers):
+    for _ in range(2):
+        await client.post(
+            "/orders/",
+            json={"items": [{"name": "item", "quantity": 1, "price": 1.0}]},
+            headers=auth_headers,
+        )
+    resp = await client.get(
+        f"/orders/user/{test_user.id}/", params={"stream": True}, headers=auth_headers
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(lines) == 2
+    assert all(line["user_id"] == test_user.id for line in lines)
+
+
+async def test_create_orders_bulk(client: AsyncClient, test_user, auth_headers, db_session):
+    resp = await client.post(
+        "/orders/bulk/",
+        json={
+            "orders": [
+                {"items": [{"name": "a", "quantity": 1, "price": 1.0}]},
+                {"items": [{"name": "b", "quantity": 3, "price": 2.0}]},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [o["total_price"] for o in data] == [1.0, 6.0]
+    assert all(o["user_id"] == test_user.id and o["status"] == "PENDING" for o in data)
+
+    events = (await db_session.scalars(select(OutboxEvent).order_by(OutboxEvent.id))).all()
+    assert [e.payload["order_id"] for e in events] == [o["id"] for o in data]
+
+
+async def test_create_orders_bulk_rejects_empty_batch(client: AsyncClient, auth_headers):
+    resp = await client.post("/orders/bulk/", json={"orders": []}, headers=auth_headers)
+    assert resp.status_code == 422
+
+
+async def test_order_writes_are_single_statements(client: AsyncClient, test_user, auth_headers, db_engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0])
+
+    # the principal is cached by the first request, so only order queries are counted below
+    await client.get(f"/orders/user/{test_user.id}/", headers=auth_headers)
+    event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        resp = await client.post("/orders/", json={"items": []}, headers=auth_headers)
+        assert statements == ["INSERT", "INSERT"]
+        order_id = resp.json()["id"]
+        await client.get(f"/orders/{order_id}/", headers=auth_headers)
+
+        statements.clear()
+        resp = await client.patch(f"/orders/{order_id}/", json={"status": "PAID"}, headers=auth_headers)
+        assert resp.json()["status"] == "PAID"
+        assert statements == ["UPDATE"]
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+
+
+async def test_get_order_conditional(client: AsyncClient, test_user, auth_headers, db_engine):
+    create_resp = await client.post("/orders/", json={"items": []}, headers=auth_headers)
+    order_id = create_resp.json()["id"]
+    resp = await client.get(f"/orders/{order_id}/", headers=auth_headers)
+    etag = resp.headers["etag"]
+    assert etag == 'W/"1"'
+    assert resp.headers["last-modified"]
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        resp = await client.get(f"/orders/{order_id}/", headers={**auth_headers, "If-None-Match": etag})
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+    assert statements == []
+
+    resp = await client.get(
+        f"/orders/{order_id}/",
+        headers={**auth_headers, "If-Modified-Since": resp.headers["last-modified"]},
+    )
+    assert resp.status_code == 304
+
+    patch_resp = await client.patch(f"/orders/{order_id}/", json={"status": "PAID"}, headers=auth_headers)
+    assert patch_resp.headers["etag"] == 'W/"2"'
+    resp = await client.get(f"/orders/{order_id}/", headers={**auth_headers, "If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["version"] == 2
+    assert resp.headers["etag"] == 'W/"2"'
+
+
+async def test_order_events_unauthorized(client: AsyncClient):
+    resp = await client.get("/orders/events/")
+    assert resp.status_code == 401
+
+
+async def test_patch_order_publishes_status(client: AsyncClient, test_user, auth_headers):
+    create_resp = await client.post("/orders/", json={"items": []}, headers=auth_headers)
+    order_id = create_resp.json()["id"]
+    with patch("app.services.order_service.publish_order_status", new_callable=AsyncMock) as publish:
+        await client.patch(f"/orders/{order_id}/", json={"status": "SHIPPED"}, headers=auth_headers)
+
+    published = publish.await_args.args[0]
+    assert (str(published.id), published.user_id, published.status) == (order_id, test_user.id, "SHIPPED")
+
+
+async def test_patch_order_publishes_status_only_after_commit(client: AsyncClient, auth_headers, db_session):
+    create_resp = await client.post("/orders/", json={"items": []}, headers=auth_headers)
+    order_id = create_resp.json()["id"]
+
+    with (
+        patch.object(db_session, "commit", new_callable=AsyncMock, side_effect=ConnectionError),
+        patch("app.services.order_service.publish_order_status", new_callable=AsyncMock) as publish,
+        pytest.raises(ConnectionError),
+    ):
+        await client.patch(f"/orders/{order_id}/", json={"status": "SHIPPED"}, headers=auth_headers)
+
+    publish.assert_not_awaited()
+
+
+async def test_rate_limited_request_gets_429(client: AsyncClient, test_user, auth_headers):
+    with patch("app.core.limiter.limiter.hit", new_callable=AsyncMock, return_value=(False, 0, 1.5)):
+        resp = await client.get(f"/orders/user/{test_user.id}/", headers=auth_headers)
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == "2"
+
+
+async def test_get_order_rendered_cache_mode(client: AsyncClient, auth_headers, registered_user, monkeypatch):
+    create_resp = await client.post(
+        "/orders/",
+        json={"items": [{"name": "x", "quantity": 2, "price": 5.0}]},
+        headers=auth_headers,
+    )
+    order_id = create_resp.json()["id"]
+    expected = (await client.get(f"/orders/{order_id}/", headers=auth_headers)).json()
+
+    monkeypatch.setattr(settings, "order_cache_rendered", True)
+    resp = await client.get(f"/orders/{order_id}/", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json() == expected
+    etag = resp.headers["etag"]
+
+    resp = await client.get(f"/orders/{order_id}/", headers={**auth_headers, "If-None-Match": etag})
+    assert resp.status_code == 304
+    resp = await client.get(f"/orders/{order_id}/", headers=registered_user)
+    assert resp.status_code == 403
+
+    await client.patch(f"/orders/{order_id}/", json={"status": "PAID"}, headers=auth_headers)
+    resp = await client.get(f"/orders/{order_id}/", headers=auth_headers)
+    assert resp.json()["status"] == "PAID"
+    assert resp.headers["etag"] != etag
+
+
+async def test_unknown_order_ids_stay_off_the_database(client: AsyncClient, test_user, auth_headers, db_engine, monkeypatch):
+    monkeypatch.setattr(settings, "order_id_filter_enabled", True)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    await client.get(f"/orders/user/{test_user.id}/", headers=auth_headers)
+    # cache misses load on the detached pool
+    engines = [db_engine.sync_engine, detached_engine(db_engine).sync_engine]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        # the filter rejects the first id; the second is let through once, then cached as missing
+        with patch("app.cache.bloom.RedisBloomFilter.might_contain", new_callable=AsyncMock, return_value=False):
+            resp = await client.get(f"/orders/{uuid.uuid4()}/", headers=auth_headers)
+        assert resp.status_code == 404
+        assert statements == []
+
+        with patch("app.cache.bloom.RedisBloomFilter.might_contain", new_callable=AsyncMock, return_value=True):
+            order_id = uuid.uuid4()
+            for _ in range(3):
+                resp = await client.get(f"/orders/{order_id}/", headers=auth_headers)
+                assert resp.status_code == 404
+        assert len(statements) == 1
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+
+async def test_get_orders_batch(client: AsyncClient, test_user, auth_headers, registered_user, db_engine):
+    order_ids = []
+    for _ in range(3):
+        resp = await client.post("/orders/", json={"items": []}, headers=auth_headers)
+        order_ids.append(resp.json()["id"])
+    unknown = str(uuid.uuid4())
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        body = {"ids": [order_ids[0], unknown, order_ids[1], order_ids[2], order_ids[0]]}
+        resp = await client.post("/orders/batch/", json=body, headers=auth_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [order["id"] for order in data["orders"]] == order_ids
+        assert data["missing"] == [unknown]
+        assert len(statements) == 1
+        assert "= ANY" in statements[0]
+
+        statements.clear()
+        resp = await client.post("/orders/batch/", json=body, headers=auth_headers)
+        assert resp.json() == data
+        assert statements == []
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+
+    resp = await client.post("/orders/batch/", json={"ids": order_ids[:1]}, headers=registered_user)
+    assert resp.status_code == 403
+    resp = await client.post("/orders/batch/", json={"ids": []}, headers=auth_headers)
+    assert resp.status_code == 422
@@ -1,3 +1,5 @@
-from app.cache.decorators import cached_entity, invalidate_cache, get_cache
+from app.cache.decorators import cached_entity, invalidate_cache, invalidate_cache_many, get_cache
+from app.cache.local import get_local_cache
+from app.cache.stats import get_cache_stats
 
-__all__ = ["cached_entity", "invalidate_cache", "get_cache"]
+__all__ = ["cached_entity", "invalidate_cache", "invalidate_cache_many", "get_cache", "get_local_cache", "get_cache_stats"]
@@ -0,0 +1,109 @@
+import hashlib
+import math
+from collections.abc import Callable, Iterable
+
+import structlog
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+
+from app.cache.client import get_redis
+
+logger = structlog.get_logger(__name__)
+
+# Sets the given bits in every key in KEYS that already exists: the live filter, and the one
+# being rebuilt, if any. A missing live filter is not created, since an empty filter would
+# reject every id.
+ADD_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        for _, bit in ipairs(ARGV) do
+            redis.call('SETBIT', key, bit, 1)
+        end
+    end
+end
+return 1
+"""
+
+# -1: no filter (not built, or evicted), 0: definitely absent, 1: maybe present
+CHECK_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+for _, bit in ipairs(ARGV) do
+    if redis.call('GETBIT', KEYS[1], bit) == 0 then
+        return 0
+    end
+end
+return 1
+"""
+
+
+class RedisBloomFilter:
+    # Bloom filter on a plain Redis bitmap (no RedisBloom module needed). Sized for `capacity`
+    # members at `error_rate` false positives; it has no false negatives as long as every member
+    # was added, which rebuild() guarantees for members added while it runs.
+    def __init__(
+        self,
+        key: str,
+        capacity: int,
+        error_rate: float,
+        redis: Callable[[], Redis] = get_redis,
+    ) -> None:
+        self.key = key
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._redis = redis
+        self._add_script: AsyncScript | None = None
+        self._check_script: AsyncScript | None = None
+
+    @property
+    def building_key(self) -> str:
+        return f"{self.key}:building"
+
+    def positions(self, member: bytes) -> list[int]:
+        # double hashing: k positions out of one 128-bit digest
+        digest = hashlib.blake2b(member, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def _scripts(self, redis: Redis) -> tuple[AsyncScript, AsyncScript]:
+        if self._add_script is None or self._check_script is None:
+            self._add_script = redis.register_script(ADD_SCRIPT)
+            self._check_script = redis.register_script(CHECK_SCRIPT)
+        return self._add_script, self._check_script
+
+    async def add_many(self, members: Iterable[bytes]) -> None:
+        bits = [bit for member in members for bit in self.positions(member)]
+        if not bits:
+            return
+        redis = self._redis()
+        add_script, _ = self._scripts(redis)
+        await add_script(keys=[self.key, self.building_key], args=bits, client=redis)
+
+    async def might_contain(self, member: bytes) -> bool:
+        redis = self._redis()
+        _, check_script = self._scripts(redis)
+        try:
+            found = await check_script(keys=[self.key], args=self.positions(member), client=redis)
+        except Exception:
+            logger.error('bloom filter unavailable', key=self.key)
+            return True
+        return found != 0
+
+    async def start_rebuild(self) -> None:
+        # an empty bitmap of the full size; concurrent add_many calls write into it from now on
+        redis = self._redis()
+        await redis.delete(self.building_key)
+        await redis.setbit(self.building_key, self.size - 1, 0)
+
+    async def add_to_rebuild(self, members: Iterable[bytes]) -> None:
+        redis = self._redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for member in members:
+                for bit in self.positions(member):
+                    pipe.setbit(self.building_key, bit, 1)
+            await pipe.execute()
+
+    async def finish_rebuild(self) -> None:
+        await self._redis().rename(self.building_key, self.key)
@@ -1,18 +1,33 @@
+import asyncio
 import inspect
+import time
 from functools import wraps
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable
 
 import structlog
 from aiocache import Cache
 from aiocache.backends.redis import RedisCache
-from aiocache.serializers import JsonSerializer
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache.invalidation import publish_invalidation, publish_invalidations
+from app.cache.local import get_local_cache
+from app.cache.serializers import build_serializer
+from app.cache.singleflight import SingleFlight
+from app.cache.stats import cache_stats
 from app.core.config import settings
+from app.db.base import detached_engine
 
 DEFAULT_TTL = 300
+REFRESH_LOCK_TTL = 10
+CAS_RETRIES = 3
+# stored in place of a result the loader didn't find
+NEGATIVE_ENTRY = {"__missing__": True}
+
+_MISSING = object()
 
 _cache: Cache | None = None
+_singleflight = SingleFlight()
 
 logger = structlog.get_logger(__name__)
 
@@ -27,18 +42,127 @@ def get_cache() -> Cache:
             db=settings.redis_db,
             password=settings.redis_password,
             ttl=DEFAULT_TTL,
-            serializer=JsonSerializer(),
+            serializer=build_serializer(settings.cache_serializer),
         )
     return _cache
 
 
 async def invalidate_cache(cache_key: str) -> None:
     cache = get_cache()
+    get_local_cache().delete(cache_key)
     try:
         await cache.delete(cache_key)
         logger.info('cache invalidated', cache_key=cache_key)
     except Exception:
-        logger.error('error invalidating cache', cache_key=cache_key)   
+        logger.error('error invalidating cache', cache_key=cache_key)
+    # evict the in-process copies held by the other API workers
+    await publish_invalidation(cache_key)
+
+
+async def invalidate_cache_many(cache_keys: list[str]) -> None:
+    # invalidate_cache for a batch: one DEL and one pipeline of invalidation messages
+    if not cache_keys:
+        return
+    cache = get_cache()
+    local_cache = get_local_cache()
+    for cache_key in cache_keys:
+        local_cache.delete(cache_key)
+    try:
+        if isinstance(cache, RedisCache):
+            await cache.client.delete(*cache_keys)
+        else:
+            for cache_key in cache_keys:
+                await cache.delete(cache_key)
+        logger.info('cache invalidated', count=len(cache_keys))
+    except Exception:
+        logger.error('error invalidating cache', count=len(cache_keys))
+    await publish_invalidations(cache_keys)
+
+
+def _raw(value: Any) -> Any:
+    return value
+
+
+async def _set_if_newer(
+    cache: Cache,
+    cache_key: str,
+    data: Any,
+    version: int,
+    ttl: int,
+    version_of: Callable[[Any], int],
+) -> bool:
+    # Compare-and-set against the stored entry, so an older version never replaces a newer one
+    # whatever order concurrent fills and write-throughs land in. Equal versions are replaced:
+    # that's how a stale-while-revalidate refresh renews fresh_until.
+    for _ in range(CAS_RETRIES):
+        current = await cache.get(cache_key, loads_fn=_raw)
+        if current is None:
+            try:
+                return await cache.add(cache_key, data, ttl=ttl)
+            except ValueError:
+                continue
+        if version_of(cache.serializer.loads(current)) > version:
+            return False
+        if await cache.set(cache_key, data, ttl=ttl, _cas_token=current):
+            return True
+    return False
+
+
+async def _add_many(cache: Cache, entries: list[tuple[str, Any, int]]) -> list[bool]:
+    # SET NX EX for each (key, value, ttl) in one pipelined round trip: like the single-key fills,
+    # a batch backfill never replaces what a concurrent write-through or prime stored meanwhile.
+    # Returns, per entry, whether it was stored.
+    if isinstance(cache, RedisCache):
+        async with cache.client.pipeline(transaction=False) as pipe:
+            for key, value, ttl in entries:
+                pipe.set(key, cache.serializer.dumps(value), ex=ttl, nx=True)
+            return [bool(added) for added in await pipe.execute()]
+    added = []
+    for key, value, ttl in entries:
+        try:
+            added.append(await cache.add(key, value, ttl=ttl))
+        except ValueError:
+            added.append(False)
+    return added
+
+
+async def call_detached(func: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict) -> Any:
+    # A load shared through single-flight outlives the caller that started it, so it must not
+    # use that caller's session: it runs on its own session on the same database (replica or
+    # primary, as the caller was routed), opened and closed by the load itself. Its connection
+    # comes from the engine's detached pool, never from the pool the caller holds one of.
+    sessions = {
+        id(value): AsyncSession(bind=detached_engine(value.bind), expire_on_commit=False)
+        for value in (*args, *kwargs.values())
+        if isinstance(value, AsyncSession)
+    }
+    if not sessions:
+        return await func(*args, **kwargs)
+    try:
+        return await func(
+            *(sessions.get(id(value), value) for value in args),
+            **{name: sessions.get(id(value), value) for name, value in kwargs.items()},
+        )
+    finally:
+        for session in sessions.values():
+            await session.close()
+
+
+async def _acquire_refresh_lock(cache: Cache, cache_key: str, lock_ttl: int) -> bool:
+    try:
+        return await cache.add(f"{cache_key}:lock", 1, ttl=lock_ttl)
+    except ValueError:
+        return False
+    except Exception:
+        logger.error('error acquiring refresh lock', cache_key=cache_key)
+        return False
+
+
+async def _release_refresh_lock(cache: Cache, cache_key: str) -> None:
+    try:
+        await cache.delete(f"{cache_key}:lock")
+    except Exception:
+        logger.error('error releasing refresh lock', cache_key=cache_key)
 
 
 def cached_entity(
@@ -46,12 +170,200 @@ def cached_entity(
     key_param_name: str | Callable[..., str | int] = "id",
     ttl: int = DEFAULT_TTL,
     response_model: type[BaseModel] | None = None,
+    stale_ttl: int = 0,
+    lock_ttl: int = REFRESH_LOCK_TTL,
+    local_ttl: float = 0,
+    version_key: str | None = None,
+    negative_ttl: int = 0,
 ):
+    # stale_ttl > 0 enables stale-while-revalidate: entries live ttl + stale_ttl seconds in Redis,
+    # and once ttl has passed a single worker (holding a Redis lock) reloads the entry while
+    # everyone else keeps being served the stale value.
+    # local_ttl > 0 keeps results in an in-process LRU in front of Redis; entries are evicted on
+    # every worker through invalidate_cache.
+    # The wrapper's write_through(key_value, result) stores a freshly written value in place of
+    # invalidate_cache. version_key names a field of the cached data that grows with every change
+    # (e.g. a row version): Redis writes then never replace an entry with an older version, so a
+    # fill that read the row before an update can't overwrite the write-through.
+    # negative_ttl > 0 caches "not found" for that long, so repeated lookups of unknown keys stay
+    # off the database. Negative entries never replace a cached value; prime(pairs) stores newly
+    # created values once they are committed, replacing a miss that may have been cached meanwhile.
+    # get_many(key_values, load_many) resolves a batch: local hits, then one MGET, then a single
+    # load_many(missing key values) -> {key value: result} call, backfilled in one pipeline.
+    # Stale entries are reloaded in the same call and written back like a revalidation (through
+    # the version check when version_key is set), since the NX backfill can't replace them.
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
         sig = inspect.signature(func)
         param_names = list(sig.parameters.keys())
         key_param_index = param_names.index(key_param_name) if key_param_name in param_names else None
 
+        def from_cache(cached_data: Any) -> Any:
+            if response_model:
+                return response_model.model_validate(cached_data)
+            return cached_data
+
+        def remember(cache_key: str, result: Any, fresh_until: float) -> Any:
+            # never keep a local copy longer than the Redis entry is fresh
+            remaining = min(local_ttl, fresh_until - time.time())
+            if remaining > 0:
+                get_local_cache().set(cache_key, result, ttl=remaining)
+            return result
+
+        def stored_version(cached_data: Any) -> int:
+            if cached_data == NEGATIVE_ENTRY:
+                return -1
+            return (cached_data["value"] if stale_ttl else cached_data)[version_key]
+
+        def to_cached(result: Any) -> Any:
+            data_to_cache = result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+            if stale_ttl:
+                data_to_cache = {"value": data_to_cache, "fresh_until": time.time() + ttl}
+            return data_to_cache
+
+        async def store(cache: Cache, cache_key: str, result: Any) -> bool:
+            data_to_cache = to_cached(result)
+            if version_key:
+                version = (data_to_cache["value"] if stale_ttl else data_to_cache)[version_key]
+                return await _set_if_newer(
+                    cache, cache_key, data_to_cache, version, ttl + stale_ttl, stored_version
+                )
+            return await cache.set(cache_key, data_to_cache, ttl=ttl + stale_ttl)
+
+        async def load(cache: Cache, cache_key: str, args: tuple, kwargs: dict) -> Any:
+            result = await call_detached(func, args, kwargs)
+
+            # the local tier only takes what Redis accepted: a fill that read the row before an
+            # update must not land in it right after the write-through evicted the key
+            if result is not None:
+                try:
+                    if await store(cache, cache_key, result) and local_ttl:
+                        get_local_cache().set(cache_key, result, ttl=local_ttl)
+                except Exception:
+                    logger.error('error setting cached data', cache_key=cache_key)
+            elif negative_ttl:
+                try:
+                    if await cache.add(cache_key, NEGATIVE_ENTRY, ttl=negative_ttl) and local_ttl:
+                        get_local_cache().set(cache_key, _MISSING, ttl=min(local_ttl, negative_ttl))
+                except ValueError:
+                    pass
+                except Exception:
+                    logger.error('error setting cached data', cache_key=cache_key)
+
+            return result
+
+        async def get_many(
+            key_values: list[Any],
+            load_many: Callable[[list[Any]], Awaitable[dict[Any, Any]]],
+        ) -> dict[Any, Any]:
+            results: dict[Any, Any] = {}
+            pending = []
+            for key_value in key_values:
+                local_data = get_local_cache().get(f"{key_prefix}{key_value}") if local_ttl else None
+                if local_data is None:
+                    pending.append(key_value)
+                elif local_data is not _MISSING:
+                    results[key_value] = local_data
+            if local_ttl:
+                cache_stats["local"].hits += len(key_values) - len(pending)
+                cache_stats["local"].misses += len(pending)
+            if not pending:
+                return results
+
+            cache = get_cache()
+            cached: list[Any] = [None] * len(pending)
+            try:
+                cached = await cache.multi_get([f"{key_prefix}{key_value}" for key_value in pending])
+            except Exception:
+                logger.error('error getting cached data', key_prefix=key_prefix, count=len(pending))
+            missing = []
+            stale = set()
+            now = time.time()
+            for key_value, cached_data in zip(pending, cached):
+                # stale entries are reloaded with the misses rather than revalidated one by one
+                if cached_data is None:
+                    missing.append(key_value)
+                elif stale_ttl and cached_data != NEGATIVE_ENTRY and now >= cached_data["fresh_until"]:
+                    missing.append(key_value)
+                    stale.add(key_value)
+                elif cached_data != NEGATIVE_ENTRY:
+                    results[key_value] = from_cache(cached_data["value"] if stale_ttl else cached_data)
+            cache_stats["redis"].hits += len(pending) - len(missing)
+            cache_stats["redis"].misses += len(missing)
+            if not missing:
+                return results
+
+            loaded = await load_many(missing)
+            backfill = []
+            refreshed = []
+            # what the local tier gets for each key, once Redis has accepted it
+            local_values: dict[str, tuple[Any, float]] = {}
+            for key_value in missing:
+                result = loaded.get(key_value)
+                cache_key = f"{key_prefix}{key_value}"
+                if result is not None:
+                    results[key_value] = result
+                    local_values[cache_key] = (result, local_ttl)
+                    if key_value in stale:
+                        refreshed.append((cache_key, result))
+                    else:
+                        backfill.append((cache_key, to_cached(result), ttl + stale_ttl))
+                elif negative_ttl:
+                    local_values[cache_key] = (_MISSING, min(local_ttl, negative_ttl))
+                    backfill.append((cache_key, NEGATIVE_ENTRY, negative_ttl))
+            accepted = []
+            try:
+                if backfill:
+                    added = await _add_many(cache, backfill)
+                    accepted += [cache_key for (cache_key, _, _), ok in zip(backfill, added) if ok]
+            except Exception:
+                logger.error('error setting cached data', key_prefix=key_prefix, count=len(backfill))
+            stored = await asyncio.gather(
+                *(store(cache, cache_key, result) for cache_key, result in refreshed), return_exceptions=True
+            )
+            if any(isinstance(outcome, Exception) for outcome in stored):
+                logger.error('error setting cached data', key_prefix=key_prefix, count=len(refreshed))
+            accepted += [cache_key for (cache_key, _), ok in zip(refreshed, stored) if ok is True]
+            if local_ttl:
+                for cache_key in accepted:
+                    get_local_cache().set(cache_key, *local_values[cache_key])
+            return results
+
+        async def prime(pairs: list[tuple[Any, Any]]) -> None:
+            # values known to be new: nothing cached for them can be more recent, so no version check
+            if not pairs:
+                return
+            try:
+                await get_cache().multi_set(
+                    [(f"{key_prefix}{key_value}", to_cached(result)) for key_value, result in pairs],
+                    ttl=ttl + stale_ttl,
+                )
+            except Exception:
+                logger.error('error priming cache', key_prefix=key_prefix, count=len(pairs))
+
+        async def write_through(key_value: Any, result: Any) -> None:
+            cache_key = f"{key_prefix}{key_value}"
+            get_local_cache().delete(cache_key)
+            try:
+                if await store(get_cache(), cache_key, result):
+                    logger.info('cache written through', cache_key=cache_key)
+                else:
+                    logger.info('cache write-through skipped, newer version cached', cache_key=cache_key)
+            except Exception:
+                logger.error('error writing through cache', cache_key=cache_key)
+                await invalidate_cache(cache_key)
+                return
+            await publish_invalidation(cache_key)
+
+        async def revalidate(cache: Cache, cache_key: str, stale: Any, args: tuple, kwargs: dict) -> Any:
+            logger.info('cache stale, revalidating', cache_key=cache_key)
+            try:
+                return await _singleflight.do(cache_key, lambda: load(cache, cache_key, args, kwargs))
+            except Exception:
+                logger.error('error revalidating, serving stale data', cache_key=cache_key)
+                return from_cache(stale)
+            finally:
+                await _release_refresh_lock(cache, cache_key)
+
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> Any:
             cache = get_cache()
@@ -68,32 +380,46 @@ def cached_entity(
 
             cache_key = f"{key_prefix}{cache_key_value}"
 
+            if local_ttl:
+                local_data = get_local_cache().get(cache_key)
+                if local_data is not None:
+                    cache_stats["local"].hits += 1
+                    return None if local_data is _MISSING else local_data
+                cache_stats["local"].misses += 1
+
             try:
                 cached_data = await cache.get(cache_key)
                 if cached_data is not None:
-                    if response_model:
+                    cache_stats["redis"].hits += 1
+                    if cached_data == NEGATIVE_ENTRY:
+                        logger.info('cache hit, negative', cache_key=cache_key)
+                        if local_ttl:
+                            get_local_cache().set(cache_key, _MISSING, ttl=min(local_ttl, negative_ttl or ttl))
+                        return None
+                    if not stale_ttl:
+                        logger.info('cache hit', cache_key=cache_key)
+                        return remember(cache_key, from_cache(cached_data), time.time() + ttl)
+                    if time.time() < cached_data["fresh_until"]:
                         logger.info('cache hit', cache_key=cache_key)
-                        return response_model.model_validate(cached_data)
-                    return cached_data
+                        return remember(
+                            cache_key, from_cache(cached_data["value"]), cached_data["fresh_until"]
+                        )
+                    if await _acquire_refresh_lock(cache, cache_key, lock_ttl):
+                        return await revalidate(cache, cache_key, cached_data["value"], args, kwargs)
+                    logger.info('cache hit, stale', cache_key=cache_key)
+                    return from_cache(cached_data["value"])
             except Exception:
                 logger.error('error getting cached data', cache_key=cache_key)
 
+            cache_stats["redis"].misses += 1
             logger.info('cache miss', cache_key=cache_key)
 
-            result = await func(*args, **kwargs)
-
-            if result is not None:
-                try:
-                    if isinstance(result, BaseModel):
-                        data_to_cache = result.model_dump(mode="json")
-                    else:
-                        data_to_cache = result
-                    await cache.set(cache_key, data_to_cache, ttl=ttl)
-                except Exception:
-                    logger.error('error setting cached data', cache_key=cache_key)
-
-            return result
+            # concurrent misses on the same key in this process wait on a single load
+            return await _singleflight.do(cache_key, lambda: load(cache, cache_key, args, kwargs))
 
+        wrapper.write_through = write_through
+        wrapper.prime = prime
+        wrapper.get_many = get_many
         return wrapper
 
     return decorator
@@ -0,0 +1,48 @@
+import asyncio
+
+import structlog
+
+from app.cache.client import get_redis
+from app.cache.local import get_local_cache
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+RECONNECT_DELAY = 1.0
+
+logger = structlog.get_logger(__name__)
+
+
+async def publish_invalidation(cache_key: str) -> None:
+    try:
+        await get_redis().publish(INVALIDATION_CHANNEL, cache_key)
+    except Exception:
+        logger.error('error publishing cache invalidation', cache_key=cache_key)
+
+
+async def publish_invalidations(cache_keys: list[str]) -> None:
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for cache_key in cache_keys:
+                pipe.publish(INVALIDATION_CHANNEL, cache_key)
+            await pipe.execute()
+    except Exception:
+        logger.error('error publishing cache invalidations', count=len(cache_keys))
+
+
+async def listen_for_invalidations() -> None:
+    local_cache = get_local_cache()
+    while True:
+        pubsub = get_redis().pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    local_cache.delete(message["data"].decode("utf-8"))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # invalidations may have been missed while disconnected, so nothing local can be trusted
+            logger.error('cache invalidation listener disconnected')
+            local_cache.clear()
+            await asyncio.sleep(RECONNECT_DELAY)
+        finally:
+            await pubsub.aclose()
@@ -0,0 +1,51 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.core.config import settings
+
+_local_cache: "LocalCache | None" = None
+
+
+class LocalCache:
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self._ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def get_local_cache() -> LocalCache:
+    global _local_cache
+    if _local_cache is None:
+        _local_cache = LocalCache(
+            max_size=settings.local_cache_max_size,
+            ttl=settings.local_cache_ttl,
+        )
+    return _local_cache
@@ -0,0 +1,191 @@
+import asyncio
+import inspect
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable
+
+import orjson
+import structlog
+from aiocache import Cache
+from aiocache.backends.redis import RedisCache
+
+from app.cache.decorators import DEFAULT_TTL, call_detached, get_cache
+from app.cache.invalidation import publish_invalidation, publish_invalidations
+from app.cache.local import get_local_cache
+from app.cache.singleflight import SingleFlight
+from app.cache.stats import cache_stats
+
+META_SUFFIX = ":meta"
+# meta record left by a versioned invalidation: fills of an older version can't replace it
+INVALIDATED = "__invalidated__"
+
+# Sets the body (KEYS[1]) and the meta record (KEYS[2]) together, unless the stored meta record,
+# or the tombstone in its place, holds a version newer than ARGV[3]. 1: stored, 0: skipped
+STORE_IF_NEWER_SCRIPT = """
+local current = redis.call('GET', KEYS[2])
+if current then
+    local meta = cjson.decode(current)
+    local stored = meta[ARGV[4]] or meta['__invalidated__']
+    if stored and tonumber(stored) > tonumber(ARGV[3]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[5])
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[5])
+return 1
+"""
+
+_singleflight = SingleFlight()
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedEntity:
+    # body: the finished response bytes; meta: the few fields a request needs to decide on them
+    # (owner, version...), so nothing has to parse the body
+    body: bytes
+    meta: dict
+
+
+def _raw(value: Any) -> Any:
+    return value
+
+
+def _as_bytes(value: bytes | str) -> bytes:
+    # the json serializer hands values back decoded
+    return value if isinstance(value, bytes) else value.encode("utf-8")
+
+
+def _tombstone(version: int) -> bytes:
+    return orjson.dumps({INVALIDATED: version})
+
+
+async def _store_if_newer(cache: Cache, cache_key: str, result: RenderedEntity, version_key: str, ttl: int) -> bool:
+    version = result.meta[version_key]
+    meta = orjson.dumps(result.meta)
+    if isinstance(cache, RedisCache):
+        script = cache.client.register_script(STORE_IF_NEWER_SCRIPT)
+        stored = await script(
+            keys=[cache_key, cache_key + META_SUFFIX], args=[result.body, meta, version, version_key, ttl]
+        )
+        return stored == 1
+    current = await cache.get(cache_key + META_SUFFIX, loads_fn=_raw)
+    if current is not None:
+        current = orjson.loads(current)
+        if current.get(version_key, current.get(INVALIDATED, -1)) > version:
+            return False
+    await cache.multi_set([(cache_key, result.body), (cache_key + META_SUFFIX, meta)], ttl=ttl, dumps_fn=_raw)
+    return True
+
+
+async def invalidate_rendered(cache_key: str, version: int | None = None, ttl: int = DEFAULT_TTL) -> None:
+    # version: the version just committed; instead of dropping the meta record, leave a tombstone
+    # so a render of an older version that is still in flight can't store it afterwards
+    cache = get_cache()
+    get_local_cache().delete(cache_key)
+    try:
+        if version is None:
+            await asyncio.gather(cache.delete(cache_key), cache.delete(cache_key + META_SUFFIX))
+        else:
+            await asyncio.gather(
+                cache.delete(cache_key),
+                cache.set(cache_key + META_SUFFIX, _tombstone(version), ttl=ttl, dumps_fn=_raw),
+            )
+        logger.info('cache invalidated', cache_key=cache_key)
+    except Exception:
+        logger.error('error invalidating cache', cache_key=cache_key)
+    await publish_invalidation(cache_key)
+
+
+async def invalidate_rendered_many(versions: dict[str, int], ttl: int = DEFAULT_TTL) -> None:
+    # invalidate_rendered(key, version) for a batch, in one pipeline
+    if not versions:
+        return
+    cache = get_cache()
+    local_cache = get_local_cache()
+    for cache_key in versions:
+        local_cache.delete(cache_key)
+    try:
+        if isinstance(cache, RedisCache):
+            async with cache.client.pipeline(transaction=False) as pipe:
+                for cache_key, version in versions.items():
+                    pipe.delete(cache_key)
+                    pipe.set(cache_key + META_SUFFIX, _tombstone(version), ex=ttl)
+                await pipe.execute()
+        else:
+            for cache_key, version in versions.items():
+                await cache.delete(cache_key)
+                await cache.set(cache_key + META_SUFFIX, _tombstone(version), ttl=ttl, dumps_fn=_raw)
+        logger.info('cache invalidated', count=len(versions))
+    except Exception:
+        logger.error('error invalidating cache', count=len(versions))
+    await publish_invalidations(list(versions))
+
+
+def cached_rendered(
+    key_prefix: str,
+    key_param_name: str = "id",
+    ttl: int = DEFAULT_TTL,
+    local_ttl: float = 0,
+    version_key: str | None = None,
+):
+    # Like cached_entity, but for functions returning a RenderedEntity. The body and the meta
+    # record live in two Redis keys ("<key>" and "<key>:meta"), read with one MGET and stored
+    # as raw bytes, bypassing the cache serializer. invalidate_rendered("<key>") drops both.
+    # version_key names a meta field that grows with every change: a fill then never replaces a
+    # newer version, nor the tombstone invalidate_rendered("<key>", version) leaves behind.
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        param_names = list(inspect.signature(func).parameters.keys())
+        key_param_index = param_names.index(key_param_name)
+
+        async def load(cache_key: str, args: tuple, kwargs: dict) -> RenderedEntity | None:
+            result = await call_detached(func, args, kwargs)
+            if result is not None:
+                try:
+                    if version_key:
+                        stored = await _store_if_newer(get_cache(), cache_key, result, version_key, ttl)
+                    else:
+                        stored = await get_cache().multi_set(
+                            [(cache_key, result.body), (cache_key + META_SUFFIX, orjson.dumps(result.meta))],
+                            ttl=ttl,
+                            dumps_fn=_raw,
+                        )
+                    # like cached_entity, the local tier only takes what Redis accepted
+                    if stored and local_ttl:
+                        get_local_cache().set(cache_key, result, ttl=local_ttl)
+                except Exception:
+                    logger.error('error setting cached data', cache_key=cache_key)
+            return result
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> RenderedEntity | None:
+            key_value = kwargs.get(key_param_name)
+            if key_value is None and key_param_index < len(args):
+                key_value = args[key_param_index]
+            cache_key = f"{key_prefix}{key_value}"
+
+            if local_ttl:
+                local_data = get_local_cache().get(cache_key)
+                if local_data is not None:
+                    cache_stats["local"].hits += 1
+                    return local_data
+                cache_stats["local"].misses += 1
+
+            try:
+                body, meta = await get_cache().multi_get([cache_key, cache_key + META_SUFFIX], loads_fn=_raw)
+                if body is not None and meta is not None:
+                    cache_stats["redis"].hits += 1
+                    result = RenderedEntity(body=_as_bytes(body), meta=orjson.loads(meta))
+                    if local_ttl:
+                        get_local_cache().set(cache_key, result, ttl=local_ttl)
+                    return result
+            except Exception:
+                logger.error('error getting cached data', cache_key=cache_key)
+
+            cache_stats["redis"].misses += 1
+            return await _singleflight.do(cache_key, lambda: load(cache_key, args, kwargs))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,28 @@
+import orjson
+from aiocache.serializers import BaseSerializer, JsonSerializer
+
+
+class OrjsonSerializer(BaseSerializer):
+    # no encoding: Redis hands back the raw bytes and orjson parses them without a str copy
+    DEFAULT_ENCODING = None
+
+    def dumps(self, value) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, value):
+        if value is None:
+            return None
+        return orjson.loads(value)
+
+
+SERIALIZERS: dict[str, type[BaseSerializer]] = {
+    "json": JsonSerializer,
+    "orjson": OrjsonSerializer,
+}
+
+
+def build_serializer(name: str) -> BaseSerializer:
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown cache serializer: {name!r}") from None
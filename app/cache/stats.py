@@ -0,0 +1,22 @@
+class TierStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": round(self.hit_ratio, 4)}
+
+
+cache_stats: dict[str, TierStats] = {
+    "local": TierStats(),
+    "redis": TierStats(),
+}
+
+
+def get_cache_stats() -> dict[str, dict]:
+    return {tier: stats.as_dict() for tier, stats in cache_stats.items()}
@@ -0,0 +1,52 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.cache.bloom import RedisBloomFilter
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_filter(check_result=None, check_error=None) -> tuple[RedisBloomFilter, AsyncMock, AsyncMock]:
+    add_script = AsyncMock()
+    check_script = AsyncMock(return_value=check_result, side_effect=check_error)
+    redis = MagicMock()
+    redis.register_script.side_effect = [add_script, check_script]
+    return RedisBloomFilter("ids", capacity=1_000, error_rate=0.01, redis=lambda: redis), add_script, check_script
+
+
+async def test_sizing_and_positions():
+    bloom, _, _ = make_filter()
+    member = uuid.uuid4().bytes
+
+    assert (bloom.size, bloom.hashes) == (9586, 7)
+    positions = bloom.positions(member)
+    assert positions == bloom.positions(member)
+    assert len(set(positions)) == 7
+    assert all(0 <= position < bloom.size for position in positions)
+
+
+async def test_add_many_writes_live_and_building_filters():
+    bloom, add_script, _ = make_filter()
+    members = [uuid.uuid4().bytes, uuid.uuid4().bytes]
+
+    await bloom.add_many(members)
+
+    add_script.assert_awaited_once()
+    assert add_script.await_args.kwargs["keys"] == ["ids", "ids:building"]
+    assert add_script.await_args.kwargs["args"] == bloom.positions(members[0]) + bloom.positions(members[1])
+
+
+@pytest.mark.parametrize(("check_result", "expected"), [(1, True), (0, False), (-1, True)])
+async def test_might_contain(check_result, expected):
+    bloom, _, check_script = make_filter(check_result=check_result)
+
+    assert await bloom.might_contain(b"member") is expected
+    assert check_script.await_args.kwargs["args"] == bloom.positions(b"member")
+
+
+async def test_unavailable_filter_lets_lookups_through():
+    bloom, _, _ = make_filter(check_error=ConnectionError())
+
+    assert await bloom.might_contain(b"member") is True
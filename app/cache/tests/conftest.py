@@ -0,0 +1,16 @@
+from unittest.mock import patch
+
+import pytest
+from aiocache import SimpleMemoryCache
+
+from app.cache.local import get_local_cache
+from app.cache.serializers import OrjsonSerializer
+
+
+@pytest.fixture
+async def memory_cache():
+    cache = SimpleMemoryCache(serializer=OrjsonSerializer())
+    with patch("app.cache.decorators._cache", cache):
+        yield cache
+    await cache.clear()
+    get_local_cache().clear()
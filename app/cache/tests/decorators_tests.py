@@ -0,0 +1,326 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.cache.decorators import NEGATIVE_ENTRY, cached_entity, invalidate_cache
+from app.cache.local import get_local_cache
+from app.cache.stats import cache_stats
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_misses_load_once(memory_cache):
+    calls = 0
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id")
+    async def load_item(item_id: int) -> dict:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": item_id}
+
+    results = await asyncio.gather(*(load_item(1) for _ in range(20)))
+
+    assert calls == 1
+    assert all(result == {"id": 1} for result in results)
+    assert await memory_cache.get("item:1") == {"id": 1}
+
+
+async def test_shared_load_survives_the_caller_that_started_it(memory_cache, db_engine):
+    sessions = []
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id")
+    async def load_item(item_id: int, session: AsyncSession) -> dict:
+        sessions.append(session)
+        await asyncio.sleep(0.05)
+        return {"id": item_id, "one": await session.scalar(text("SELECT 1"))}
+
+    async with AsyncSession(db_engine) as first, AsyncSession(db_engine) as second:
+        leader = asyncio.create_task(load_item(1, first))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(load_item(1, second))
+        await asyncio.sleep(0.01)
+        # the request that started the load goes away and its session is closed
+        leader.cancel()
+        await first.close()
+
+        assert await follower == {"id": 1, "one": 1}
+
+    assert len(sessions) == 1
+    assert sessions[0] is not first and sessions[0] is not second
+
+
+async def test_shared_load_does_not_wait_on_the_callers_pool(memory_cache, db_engine):
+    @cached_entity(key_prefix="item:", key_param_name="item_id")
+    async def load_item(item_id: int, session: AsyncSession) -> dict:
+        return {"id": item_id, "one": await session.scalar(text("SELECT 1"))}
+
+    engine = create_async_engine(db_engine.url, pool_size=1, max_overflow=0, pool_timeout=0.5)
+    try:
+        async with AsyncSession(engine) as session:
+            # the request holds the only connection of its pool, e.g. after the principal lookup
+            await session.scalar(text("SELECT 1"))
+
+            assert await load_item(1, session) == {"id": 1, "one": 1}
+    finally:
+        await engine.dispose()
+
+
+async def test_failed_load_is_shared_and_not_cached(memory_cache):
+    calls = 0
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id")
+    async def load_item(item_id: int) -> dict:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    results = await asyncio.gather(*(load_item(1) for _ in range(5)), return_exceptions=True)
+
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert await memory_cache.get("item:1") is None
+
+
+async def test_stale_entry_refreshed_by_single_caller(memory_cache):
+    calls = 0
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id", stale_ttl=60)
+    async def load_item(item_id: int) -> dict:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": item_id, "version": 2}
+
+    await memory_cache.set(
+        "item:1", {"value": {"id": 1, "version": 1}, "fresh_until": time.time() - 1}
+    )
+
+    results = await asyncio.gather(*(load_item(1) for _ in range(10)))
+
+    assert calls == 1
+    assert results.count({"id": 1, "version": 2}) == 1
+    assert results.count({"id": 1, "version": 1}) == 9
+    cached = await memory_cache.get("item:1")
+    assert cached["value"] == {"id": 1, "version": 2}
+    assert await memory_cache.get("item:1:lock") is None
+
+
+async def test_stale_entry_served_when_refresh_fails(memory_cache):
+    @cached_entity(key_prefix="item:", key_param_name="item_id", stale_ttl=60)
+    async def load_item(item_id: int) -> dict:
+        raise RuntimeError("db down")
+
+    await memory_cache.set(
+        "item:1", {"value": {"id": 1, "version": 1}, "fresh_until": time.time() - 1}
+    )
+
+    assert await load_item(1) == {"id": 1, "version": 1}
+
+
+async def test_local_tier_serves_repeat_reads(memory_cache):
+    calls = 0
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id", local_ttl=30)
+    async def load_item(item_id: int) -> dict:
+        nonlocal calls
+        calls += 1
+        return {"id": item_id}
+
+    await load_item(1)
+    await memory_cache.delete("item:1")
+    local_hits = cache_stats["local"].hits
+
+    assert await load_item(1) == {"id": 1}
+    assert calls == 1
+    assert cache_stats["local"].hits == local_hits + 1
+
+
+async def test_invalidate_evicts_local_tier_and_notifies_workers(memory_cache):
+    calls = 0
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id", local_ttl=30)
+    async def load_item(item_id: int) -> dict:
+        nonlocal calls
+        calls += 1
+        return {"id": item_id, "calls": calls}
+
+    await load_item(1)
+    with patch("app.cache.decorators.publish_invalidation", new_callable=AsyncMock) as publish:
+        await invalidate_cache("item:1")
+
+    publish.assert_awaited_once_with("item:1")
+    assert await load_item(1) == {"id": 1, "calls": 2}
+
+
+async def test_write_through_is_served_without_loading(memory_cache):
+    calls = 0
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id", local_ttl=30, version_key="version")
+    async def load_item(item_id: int) -> dict:
+        nonlocal calls
+        calls += 1
+        return {"id": item_id, "version": 1}
+
+    await load_item(1)
+    with patch("app.cache.decorators.publish_invalidation", new_callable=AsyncMock) as publish:
+        await load_item.write_through(1, {"id": 1, "version": 2})
+
+    publish.assert_awaited_once_with("item:1")
+    assert await load_item(1) == {"id": 1, "version": 2}
+    assert calls == 1
+
+
+async def test_fill_that_raced_an_update_does_not_overwrite_it(memory_cache):
+    @cached_entity(key_prefix="item:", key_param_name="item_id", version_key="version")
+    async def load_item(item_id: int) -> dict:
+        # read the row before the update below, finishes after its write-through
+        await asyncio.sleep(0.05)
+        return {"id": item_id, "version": 1}
+
+    fill = asyncio.create_task(load_item(1))
+    await asyncio.sleep(0.01)
+    await load_item.write_through(1, {"id": 1, "version": 2})
+
+    assert await fill == {"id": 1, "version": 1}
+    assert await memory_cache.get("item:1") == {"id": 1, "version": 2}
+
+
+async def test_fill_that_raced_an_update_stays_out_of_the_local_tier(memory_cache):
+    @cached_entity(key_prefix="item:", key_param_name="item_id", local_ttl=30, version_key="version")
+    async def load_item(item_id: int) -> dict:
+        await asyncio.sleep(0.05)
+        return {"id": item_id, "version": 1}
+
+    async def load_many(item_ids: list[int]) -> dict[int, dict]:
+        await asyncio.sleep(0.05)
+        return {item_id: {"id": item_id, "version": 1} for item_id in item_ids}
+
+    fill = asyncio.create_task(load_item(1))
+    batch = asyncio.create_task(load_item.get_many([2], load_many))
+    await asyncio.sleep(0.01)
+    await load_item.write_through(1, {"id": 1, "version": 2})
+    await load_item.write_through(2, {"id": 2, "version": 2})
+    await fill
+    await batch
+
+    assert get_local_cache().get("item:1") is None
+    assert get_local_cache().get("item:2") is None
+    assert await load_item(1) == {"id": 1, "version": 2}
+    assert await load_item.get_many([2], load_many) == {2: {"id": 2, "version": 2}}
+
+
+async def test_write_through_keeps_newer_cached_version(memory_cache):
+    @cached_entity(key_prefix="item:", key_param_name="item_id", version_key="version")
+    async def load_item(item_id: int) -> dict:
+        return {"id": item_id, "version": 1}
+
+    await load_item.write_through(1, {"id": 1, "version": 3})
+    await load_item.write_through(1, {"id": 1, "version": 2})
+
+    assert await memory_cache.get("item:1") == {"id": 1, "version": 3}
+
+
+async def test_versioned_stale_refresh_renews_same_version(memory_cache):
+    @cached_entity(key_prefix="item:", key_param_name="item_id", stale_ttl=60, version_key="version")
+    async def load_item(item_id: int) -> dict:
+        return {"id": item_id, "version": 1}
+
+    await memory_cache.set(
+        "item:1", {"value": {"id": 1, "version": 1}, "fresh_until": time.time() - 1}
+    )
+    await load_item(1)
+
+    assert (await memory_cache.get("item:1"))["fresh_until"] > time.time()
+
+
+async def test_missing_results_are_cached_for_negative_ttl(memory_cache):
+    calls = 0
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id", local_ttl=30, negative_ttl=30)
+    async def load_item(item_id: int) -> dict | None:
+        nonlocal calls
+        calls += 1
+        return None
+
+    assert await load_item(1) is None
+    assert await load_item(1) is None
+    get_local_cache().clear()
+    assert await load_item(1) is None
+
+    assert calls == 1
+    assert await memory_cache.get("item:1") == NEGATIVE_ENTRY
+
+
+async def test_negative_entry_never_replaces_a_value(memory_cache):
+    @cached_entity(key_prefix="item:", key_param_name="item_id", negative_ttl=30, version_key="version")
+    async def load_item(item_id: int) -> dict | None:
+        # looked before the row was committed, finishes after the creator primed the cache
+        await asyncio.sleep(0.05)
+        return None
+
+    lookup = asyncio.create_task(load_item(1))
+    await asyncio.sleep(0.01)
+    await load_item.prime([(1, {"id": 1, "version": 1})])
+
+    assert await lookup is None
+    assert await memory_cache.get("item:1") == {"id": 1, "version": 1}
+    assert await load_item(1) == {"id": 1, "version": 1}
+
+
+async def test_write_through_replaces_negative_entry(memory_cache):
+    @cached_entity(key_prefix="item:", key_param_name="item_id", negative_ttl=30, version_key="version")
+    async def load_item(item_id: int) -> dict | None:
+        return None
+
+    await load_item(1)
+    await load_item.write_through(1, {"id": 1, "version": 2})
+
+    assert await load_item(1) == {"id": 1, "version": 2}
+
+
+async def test_get_many_loads_only_misses_in_one_call(memory_cache):
+    batches = []
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id", negative_ttl=30, version_key="version")
+    async def load_item(item_id: int) -> dict | None:
+        return None
+
+    async def load_many(item_ids: list[int]) -> dict[int, dict]:
+        batches.append(item_ids)
+        return {item_id: {"id": item_id, "version": 1} for item_id in item_ids if item_id != 4}
+
+    await memory_cache.set("item:1", {"id": 1, "version": 5})
+    await memory_cache.set("item:2", NEGATIVE_ENTRY)
+
+    assert await load_item.get_many([1, 2, 3, 4], load_many) == {1: {"id": 1, "version": 5}, 3: {"id": 3, "version": 1}}
+    assert batches == [[3, 4]]
+    assert await memory_cache.get("item:3") == {"id": 3, "version": 1}
+    assert await memory_cache.get("item:4") == NEGATIVE_ENTRY
+
+    assert await load_item.get_many([1, 2, 3, 4], load_many) == {1: {"id": 1, "version": 5}, 3: {"id": 3, "version": 1}}
+    assert batches == [[3, 4]]
+
+
+async def test_get_many_writes_back_reloaded_stale_entries(memory_cache):
+    batches = []
+
+    @cached_entity(key_prefix="item:", key_param_name="item_id", stale_ttl=60, version_key="version")
+    async def load_item(item_id: int) -> dict | None:
+        return None
+
+    async def load_many(item_ids: list[int]) -> dict[int, dict]:
+        batches.append(item_ids)
+        return {item_id: {"id": item_id, "version": 2} for item_id in item_ids}
+
+    await memory_cache.set("item:1", {"value": {"id": 1, "version": 1}, "fresh_until": time.time() - 1})
+
+    assert await load_item.get_many([1], load_many) == {1: {"id": 1, "version": 2}}
+    assert await load_item.get_many([1], load_many) == {1: {"id": 1, "version": 2}}
+    assert batches == [[1]]
+    assert (await memory_cache.get("item:1"))["fresh_until"] > time.time()
@@ -0,0 +1,27 @@
+import time
+
+from app.cache.local import LocalCache
+
+
+def test_evicts_least_recently_used():
+    cache = LocalCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    cache = LocalCache(max_size=10, ttl=5)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.cache.local import get_local_cache
+from app.cache.rendered import RenderedEntity, cached_rendered, invalidate_rendered
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_hits_return_stored_bytes_without_calling_loader(memory_cache):
+    calls = 0
+
+    @cached_rendered(key_prefix="item:", key_param_name="item_id")
+    async def load_item(item_id: int) -> RenderedEntity:
+        nonlocal calls
+        calls += 1
+        return RenderedEntity(body=b'{"id":1,"items":[]}', meta={"owner": 7})
+
+    first = await load_item(1)
+    second = await load_item(item_id=1)
+
+    assert calls == 1
+    assert second == first == RenderedEntity(body=b'{"id":1,"items":[]}', meta={"owner": 7})
+    assert await memory_cache.get("item:1", loads_fn=lambda v: v) == b'{"id":1,"items":[]}'
+    assert await memory_cache.get("item:1:meta", loads_fn=lambda v: v) == b'{"owner":7}'
+
+
+async def test_missing_meta_record_is_a_miss(memory_cache):
+    @cached_rendered(key_prefix="item:", key_param_name="item_id")
+    async def load_item(item_id: int) -> RenderedEntity:
+        return RenderedEntity(body=b"fresh", meta={"owner": 7})
+
+    await memory_cache.set("item:1", b"orphaned body", dumps_fn=lambda v: v)
+
+    assert (await load_item(1)).body == b"fresh"
+
+
+async def test_invalidate_drops_body_meta_and_local_copy(memory_cache):
+    @cached_rendered(key_prefix="item:", key_param_name="item_id", local_ttl=60)
+    async def load_item(item_id: int) -> RenderedEntity:
+        return RenderedEntity(body=b"{}", meta={})
+
+    await load_item(1)
+    await invalidate_rendered("item:1")
+
+    assert get_local_cache().get("item:1") is None
+    assert await memory_cache.multi_get(["item:1", "item:1:meta"]) == [None, None]
+
+
+async def test_render_that_raced_an_update_is_not_stored(memory_cache):
+    versions = [1, 2]
+
+    @cached_rendered(key_prefix="item:", key_param_name="item_id", local_ttl=60, version_key="version")
+    async def load_item(item_id: int) -> RenderedEntity:
+        version = versions.pop(0)
+        # the first render read the row before the update below and finishes after it
+        await asyncio.sleep(0.05 if version == 1 else 0)
+        return RenderedEntity(body=b"v%d" % version, meta={"version": version})
+
+    render = asyncio.create_task(load_item(1))
+    await asyncio.sleep(0.01)
+    await invalidate_rendered("item:1", version=2)
+
+    assert (await render).body == b"v1"
+    assert get_local_cache().get("item:1") is None
+    assert (await load_item(1)).body == b"v2"
+    assert await memory_cache.get("item:1", loads_fn=lambda v: v) == b"v2"
@@ -0,0 +1,19 @@
+import pytest
+from aiocache.serializers import JsonSerializer
+
+from app.cache.serializers import OrjsonSerializer, build_serializer
+
+
+def test_orjson_reads_json_written_values_and_back():
+    value = {"id": "1", "items": [{"name": "a", "price": 1.5}], "status": "PAID"}
+    orjson_serializer, json_serializer = OrjsonSerializer(), JsonSerializer()
+
+    assert orjson_serializer.loads(json_serializer.dumps(value).encode("utf-8")) == value
+    assert json_serializer.loads(orjson_serializer.dumps(value).decode("utf-8")) == value
+    assert orjson_serializer.loads(None) is None
+
+
+def test_unknown_serializer_is_rejected():
+    assert isinstance(build_serializer("orjson"), OrjsonSerializer)
+    with pytest.raises(ValueError):
+        build_serializer("pickle")
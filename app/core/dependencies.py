@@ -1,19 +1,22 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.security import decode_access_token
-from app.db.base import get_db_session
-from app.db.models import User
-from app.db.repositories.user_repository import UserRepository
+from app.db.routing import get_read_db_session
+from app.schemas.auth import UserResponse
+from app.services.auth_service import get_user
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=True)
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    session: AsyncSession = Depends(get_db_session),
-) -> User:
+    session: AsyncSession = Depends(get_read_db_session),
+) -> UserResponse:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,8 +28,16 @@ async def get_current_user(
     sub = payload.get("sub")
     if sub is None:
         raise credentials_exception
-    repository = UserRepository(session)
-    user = await repository.get_by_id(int(sub))
+    # short-lived cached principal: keeps the users SELECT off every authenticated request
+    user = await get_user(int(sub), session)
     if user is None:
         raise credentials_exception
     return user
+
+
+async def require_metrics_token(x_metrics_token: str | None = Header(None)) -> None:
+    # operational data (pool and queue state) is for monitoring only, never for API clients
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_metrics_token is None or not hmac.compare_digest(x_metrics_token, settings.metrics_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics token")
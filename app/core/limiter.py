@@ -1,6 +1,115 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import inspect
+import math
+import re
+from collections.abc import Callable
+from functools import wraps
+from typing import Any
 
-from app.core.config import settings
+import structlog
+from fastapi import Request
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
 
-limiter = Limiter(key_func=get_remote_address, default_limits=[settings.rate_limit_default])
+from app.cache.client import get_redis
+from app.core.security import bearer_subject
+
+logger = structlog.get_logger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$")
+
+# GCRA: a single "theoretical arrival time" per key instead of a log or window counters.
+# Runs atomically on Redis and uses the server clock, so every worker and replica agrees.
+# Returns {allowed, remaining, retry_after_ms}.
+GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+local new_tat = tat + emission
+local allow_at = new_tat - tolerance
+if now < allow_at then
+    return {0, 0, allow_at - now}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, math.floor((now - allow_at) / emission), 0}
+"""
+
+
+class RateLimitExceededError(Exception):
+    def __init__(self, rate: str, retry_after: float) -> None:
+        super().__init__(rate)
+        self.rate = rate
+        self.retry_after = retry_after
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    # "100/minute", "10 per 5 seconds" -> (requests, period in seconds)
+    match = _RATE_RE.match(rate)
+    if match is None:
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+    amount, multiplier, unit = match.groups()
+    return int(amount), int(multiplier or 1) * PERIODS[unit]
+
+
+def rate_limit_key(request: Request) -> str:
+    # authenticated callers are limited per user, everyone else per client address
+    sub = bearer_subject(request.headers.get("authorization", ""))
+    if sub is not None:
+        return f"user:{sub}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RedisRateLimiter:
+    def __init__(self, key_func: Callable[[Request], str], redis: Callable[[], Redis] = get_redis) -> None:
+        self.enabled = True
+        self._key_func = key_func
+        self._redis = redis
+        self._script: AsyncScript | None = None
+
+    async def hit(self, key: str, requests: int, period: int) -> tuple[bool, int, float]:
+        redis = self._redis()
+        if self._script is None:
+            self._script = redis.register_script(GCRA_SCRIPT)
+        emission_ms = math.ceil(period * 1000 / requests)
+        # EVALSHA: one round trip; the script is loaded again only if Redis lost it
+        allowed, remaining, retry_after_ms = await self._script(
+            keys=[key], args=[emission_ms, emission_ms * requests], client=redis
+        )
+        return bool(allowed), int(remaining), int(retry_after_ms) / 1000
+
+    def limit(self, rate: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        requests, period = parse_rate(rate)
+
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            scope = f"{func.__module__}.{func.__name__}"
+            if "request" not in inspect.signature(func).parameters:
+                raise TypeError(f"{scope} needs a `request: Request` parameter to be rate limited")
+
+            @wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if self.enabled:
+                    await self._check(kwargs["request"], scope, rate, requests, period)
+                return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    async def _check(self, request: Request, scope: str, rate: str, requests: int, period: int) -> None:
+        key = f"ratelimit:{scope}:{self._key_func(request)}"
+        try:
+            allowed, _, retry_after = await self.hit(key, requests, period)
+        except Exception:
+            # fail open: an unreachable Redis must not take the API down with it
+            logger.error('rate limiter unavailable', key=key)
+            return
+        if not allowed:
+            raise RateLimitExceededError(rate, retry_after)
+
+
+limiter = RedisRateLimiter(key_func=rate_limit_key)
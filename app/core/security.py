@@ -1,10 +1,33 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Any
 
 import bcrypt
 from jose import JWTError, jwt
 
+from app.cache.local import LocalCache
 from app.core.config import settings
 
+# tokens without an exp claim are kept this long in the decoded-token cache
+TOKEN_CACHE_TTL = 300
+
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+_password_executor: ThreadPoolExecutor | None = None
+_password_slots: asyncio.Semaphore | None = None
+_token_cache: LocalCache | None = None
+
+
+class PasswordHashingBusyError(Exception):
+    pass
+
 
 def get_password_hash(password: str) -> str:
     password_bytes = password.encode("utf-8")
@@ -17,6 +40,55 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password_bytes, hashed_password.encode("utf-8"))
 
 
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        # bcrypt releases the GIL, so threads give real parallelism here
+        _password_executor = ThreadPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            thread_name_prefix="password-hash",
+        )
+    return _password_executor
+
+
+def _get_password_slots() -> asyncio.Semaphore:
+    global _password_slots
+    if _password_slots is None:
+        _password_slots = asyncio.Semaphore(
+            settings.password_hash_workers + settings.password_hash_max_pending
+        )
+    return _password_slots
+
+
+async def _run_password_task(fn: Callable[..., Any], *args: Any) -> Any:
+    slots = _get_password_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.password_hash_queue_timeout)
+    except TimeoutError:
+        raise PasswordHashingBusyError() from None
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_executor(), fn, *args)
+    finally:
+        slots.release()
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_task(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+
+
+def shutdown_password_executor() -> None:
+    global _password_executor, _password_slots
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+    _password_slots = None
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -27,7 +99,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
-def decode_access_token(token: str) -> dict | None:
+def _decode_jose(token: str) -> dict | None:
     try:
         return jwt.decode(
             token,
@@ -36,3 +108,68 @@ def decode_access_token(token: str) -> dict | None:
         )
     except JWTError:
         return None
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _decode_hmac(token: str) -> dict | None:
+    # HS256/384/512 only, straight on hashlib/hmac: same checks as jose for the tokens we issue
+    # (signature, alg pinned to settings, exp), without jose's generic JWS/JWK machinery
+    digest = _HMAC_DIGESTS[settings.jwt_algorithm]
+    try:
+        signing_input, _, signature = token.rpartition(".")
+        header_segment, _, payload_segment = signing_input.partition(".")
+        if json.loads(_b64url_decode(header_segment)).get("alg") != settings.jwt_algorithm:
+            return None
+        expected = hmac.new(settings.jwt_secret.encode("utf-8"), signing_input.encode("ascii"), digest).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+        claims = json.loads(_b64url_decode(payload_segment))
+        if "exp" in claims and int(claims["exp"]) <= time.time():
+            return None
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return claims if isinstance(claims, dict) else None
+
+
+def _decode(token: str) -> dict | None:
+    if settings.jwt_backend == "hmac" and settings.jwt_algorithm in _HMAC_DIGESTS:
+        return _decode_hmac(token)
+    return _decode_jose(token)
+
+
+def _get_token_cache() -> LocalCache:
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = LocalCache(max_size=settings.jwt_cache_size, ttl=TOKEN_CACHE_TTL)
+    return _token_cache
+
+
+def decode_access_token(token: str) -> dict | None:
+    if not settings.jwt_cache_size:
+        return _decode(token)
+    # keyed by digest so the cache holds no usable tokens; only verified claims are cached, so
+    # garbage tokens can't push real ones out
+    cache = _get_token_cache()
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    # callers get their own copy: a change to it must not leak into later requests
+    claims = cache.get(key)
+    if claims is not None:
+        return dict(claims)
+    claims = _decode(token)
+    if claims is not None:
+        ttl = int(claims["exp"]) - time.time() if "exp" in claims else None
+        if ttl is None or ttl > 0:
+            cache.set(key, dict(claims), ttl=ttl)
+    return claims
+
+
+def bearer_subject(authorization: str) -> str | None:
+    # "sub" of a valid token in an Authorization header value, for code running before auth
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    return None if payload is None else payload.get("sub")
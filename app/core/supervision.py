@@ -0,0 +1,110 @@
+import multiprocessing
+import time
+from collections.abc import Callable
+from multiprocessing.process import BaseProcess
+
+import structlog
+
+RESTART_DELAY = 1.0
+RESTART_MAX_DELAY = 60.0
+# a child that ran at least this long before exiting is restarted after RESTART_DELAY again
+STABLE_RUNTIME = 60.0
+
+logger = structlog.get_logger(__name__)
+
+
+def restart_delay(failures: int) -> float:
+    # doubles with every exit in a row that came before STABLE_RUNTIME
+    return min(RESTART_DELAY * 2**failures, RESTART_MAX_DELAY)
+
+
+class ProcessGroup:
+    # The child processes of a supervisor, one per numbered slot. Exited children are restarted
+    # with exponential backoff, so one that can't start (broker down, bad config) doesn't spin;
+    # nothing here sleeps, the owner's loop calls restart_exited() and reap_retired() with the
+    # time. Stopping a child sends SIGTERM and kills it only kill_after seconds later. Log events
+    # carry the group's name.
+    def __init__(
+        self,
+        name: str,
+        process_name: str,
+        target: Callable[..., None],
+        args: tuple,
+        kill_after: float,
+    ) -> None:
+        self._name = name
+        self._process_name = process_name
+        self._target = target
+        self._args = args
+        self._kill_after = kill_after
+        self._context = multiprocessing.get_context("spawn")
+        self.children: dict[int, BaseProcess] = {}
+        self.retiring: dict[BaseProcess, float] = {}
+        self._started_at: dict[int, float] = {}
+        self._failures: dict[int, int] = {}
+        self._restart_at: dict[int, float] = {}
+
+    def start(self, slot: int) -> None:
+        child = self._context.Process(
+            target=self._target, args=self._args, name=f"{self._process_name}-{slot}"
+        )
+        child.start()
+        self.children[slot] = child
+        self._started_at[slot] = time.monotonic()
+        logger.info("process_started", group=self._name, slot=slot, pid=child.pid)
+
+    def retire(self, slot: int) -> None:
+        # the slot is free at once; the child finishes its work in the background
+        child = self.children.pop(slot)
+        self._restart_at.pop(slot, None)
+        self._failures.pop(slot, None)
+        if child.is_alive():
+            child.terminate()
+            self.retiring[child] = time.monotonic() + self._kill_after
+        logger.info("process_retiring", group=self._name, slot=slot, pid=child.pid)
+
+    def restart_exited(self, now: float) -> None:
+        for slot, child in list(self.children.items()):
+            if child.is_alive():
+                continue
+            if slot not in self._restart_at:
+                if now - self._started_at[slot] >= STABLE_RUNTIME:
+                    self._failures[slot] = 0
+                delay = restart_delay(self._failures.get(slot, 0))
+                self._failures[slot] = self._failures.get(slot, 0) + 1
+                self._restart_at[slot] = now + delay
+                logger.warning(
+                    "process_exited",
+                    group=self._name,
+                    slot=slot,
+                    exitcode=child.exitcode,
+                    restart_in=delay,
+                )
+            elif now >= self._restart_at[slot]:
+                del self._restart_at[slot]
+                self.start(slot)
+
+    def reap_retired(self, now: float) -> None:
+        for child, deadline in list(self.retiring.items()):
+            if child.is_alive() and now > deadline:
+                logger.warning("process_killed", group=self._name, pid=child.pid)
+                child.kill()
+            if not child.is_alive():
+                child.join()
+                del self.retiring[child]
+
+    def stop(self) -> None:
+        # every child, retiring ones included, gets SIGTERM and the same kill deadline
+        children = list(self.children.values()) + list(self.retiring)
+        for child in children:
+            if child.is_alive():
+                child.terminate()
+        deadline = time.monotonic() + self._kill_after
+        for child in children:
+            child.join(timeout=max(deadline - time.monotonic(), 0))
+            if child.is_alive():
+                logger.warning("process_killed", group=self._name, pid=child.pid)
+                child.kill()
+                child.join()
+        self.children.clear()
+        self.retiring.clear()
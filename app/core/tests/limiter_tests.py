@@ -0,0 +1,58 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from starlette.requests import Request
+
+from app.core.limiter import RateLimitExceededError, RedisRateLimiter, parse_rate, rate_limit_key
+from app.core.security import create_access_token
+
+
+def make_request(headers: dict[str, str] | None = None) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+            "client": ("10.0.0.1", 1234),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    ("rate", "expected"),
+    [("100/minute", (100, 60)), ("5 per second", (5, 1)), ("10 per 5 minutes", (10, 300))],
+)
+def test_parse_rate(rate, expected):
+    assert parse_rate(rate) == expected
+
+
+def test_parse_rate_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_rate("lots")
+
+
+def test_key_is_user_for_valid_token_and_address_otherwise():
+    token = create_access_token(data={"sub": "42"})
+
+    assert rate_limit_key(make_request({"Authorization": f"Bearer {token}"})) == "user:42"
+    assert rate_limit_key(make_request({"Authorization": "Bearer forged"})) == "ip:10.0.0.1"
+    assert rate_limit_key(make_request()) == "ip:10.0.0.1"
+
+
+@pytest.mark.asyncio
+async def test_limit_raises_when_denied_and_fails_open_on_errors():
+    limiter = RedisRateLimiter(key_func=lambda request: "user:1")
+
+    @limiter.limit("2/second")
+    async def endpoint(request: Request) -> str:
+        return "ok"
+
+    limiter.hit = AsyncMock(return_value=(False, 0, 0.4))
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        await endpoint(request=make_request())
+    assert exc_info.value.retry_after == 0.4
+    limiter.hit.assert_awaited_once_with("ratelimit:app.core.tests.limiter_tests.endpoint:user:1", 2, 1)
+
+    limiter.hit = AsyncMock(side_effect=ConnectionError())
+    assert await endpoint(request=make_request()) == "ok"
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import PasswordHashingBusyError, get_password_hash_async, verify_password_async
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(autouse=True)
+def password_pool(monkeypatch):
+    monkeypatch.setattr(settings, "password_hash_workers", 2)
+    monkeypatch.setattr(settings, "password_hash_max_pending", 1)
+    monkeypatch.setattr(settings, "password_hash_queue_timeout", 0.05)
+    security.shutdown_password_executor()
+    yield
+    security.shutdown_password_executor()
+
+
+async def test_hashing_runs_off_the_event_loop():
+    threads = []
+    ticks = 0
+
+    def slow_hashpw(password: bytes, salt: bytes) -> bytes:
+        threads.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return b"hashed"
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticking = asyncio.create_task(ticker())
+    with patch("app.core.security.bcrypt.hashpw", side_effect=slow_hashpw):
+        assert await get_password_hash_async("secret") == "hashed"
+    ticking.cancel()
+
+    assert threads[0].startswith("password-hash")
+    # the loop kept running while the hash was computed
+    assert ticks >= 10
+
+
+async def test_slots_bound_running_and_queued_work():
+    release = threading.Event()
+    running = peak = 0
+    lock = threading.Lock()
+
+    def blocking_checkpw(password: bytes, hashed: bytes) -> bool:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        release.wait(timeout=5)
+        with lock:
+            running -= 1
+        return True
+
+    with patch("app.core.security.bcrypt.checkpw", side_effect=blocking_checkpw):
+        # 2 workers + 1 pending fill every slot
+        admitted = [asyncio.create_task(verify_password_async("secret", "hash")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(PasswordHashingBusyError):
+            await verify_password_async("secret", "hash")
+
+        release.set()
+        assert await asyncio.gather(*admitted) == [True, True, True]
+        assert await verify_password_async("secret", "hash") is True
+
+    assert peak == 2
@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from jose import jwt
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import create_access_token, decode_access_token
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    security._get_token_cache().clear()
+    yield
+    security._get_token_cache().clear()
+
+
+@pytest.fixture(params=["jose", "hmac"])
+def jwt_backend(request, monkeypatch):
+    monkeypatch.setattr(settings, "jwt_backend", request.param)
+    monkeypatch.setattr(settings, "jwt_cache_size", 0)
+    return request.param
+
+
+def test_backends_accept_valid_tokens(jwt_backend):
+    token = create_access_token(data={"sub": "7"})
+
+    claims = decode_access_token(token)
+
+    assert claims["sub"] == "7"
+    assert claims == jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+
+
+def test_backends_reject_bad_tokens(jwt_backend):
+    token = create_access_token(data={"sub": "7"})
+    header, payload, signature = token.split(".")
+    forged_payload = jwt.encode({"sub": "8"}, "other-secret", algorithm="HS256").split(".")[1]
+    other_alg = jwt.encode({"sub": "7"}, settings.jwt_secret, algorithm="HS384")
+
+    assert decode_access_token(f"{header}.{forged_payload}.{signature}") is None
+    assert decode_access_token(f"{header}.{payload}.") is None
+    assert decode_access_token(other_alg) is None
+    assert decode_access_token("not-a-token") is None
+    assert decode_access_token(create_access_token({"sub": "7"}, expires_delta=timedelta(seconds=-1))) is None
+
+
+def test_cache_skips_verification_until_expiry(monkeypatch):
+    token = create_access_token(data={"sub": "7"}, expires_delta=timedelta(seconds=30))
+    with patch("app.core.security._decode", wraps=security._decode) as decode:
+        assert decode_access_token(token)["sub"] == "7"
+        assert decode_access_token(token)["sub"] == "7"
+        assert decode.call_count == 1
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+        decode_access_token(token)
+        assert decode.call_count == 2
+
+
+def test_cache_ignores_invalid_tokens():
+    decode_access_token("not-a-token")
+
+    assert len(security._get_token_cache()) == 0
+
+
+def test_cached_claims_are_not_shared_between_callers():
+    token = create_access_token(data={"sub": "7"})
+
+    decode_access_token(token)["sub"] = "8"
+    decode_access_token(token)["role"] = "admin"
+
+    assert decode_access_token(token) == jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
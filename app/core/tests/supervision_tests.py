@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.core.supervision import RESTART_MAX_DELAY, STABLE_RUNTIME, ProcessGroup, restart_delay
+
+
+class FakeProcess:
+    pid = 1
+    exitcode = 1
+
+    def __init__(self, alive: bool = True) -> None:
+        self.alive = alive
+        self.killed = False
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def terminate(self) -> None:
+        pass
+
+    def kill(self) -> None:
+        self.killed = True
+        self.alive = False
+
+    def join(self, timeout: float | None = None) -> None:
+        pass
+
+
+@pytest.fixture
+def group():
+    group = ProcessGroup("test", "test-process", print, (), kill_after=10)
+    started = []
+
+    def start(slot: int) -> None:
+        started.append(slot)
+        group.children[slot] = FakeProcess()
+        group._started_at[slot] = 0.0
+
+    with patch.object(group, "start", side_effect=start):
+        group.started = started
+        yield group
+
+
+def test_restart_delay_backs_off_exponentially():
+    assert [restart_delay(failures) for failures in range(4)] == [1.0, 2.0, 4.0, 8.0]
+    assert restart_delay(20) == RESTART_MAX_DELAY
+
+
+def test_exited_child_is_restarted_once_its_delay_passed(group):
+    group.start(0)
+    group.children[0].alive = False
+
+    group.restart_exited(now=1.0)
+    group.restart_exited(now=1.5)
+    assert group.started == [0]
+
+    group.restart_exited(now=2.0)
+    assert group.started == [0, 0]
+
+    # crashed again right away: the next delay is twice as long
+    group.children[0].alive = False
+    group.restart_exited(now=2.5)
+    group.restart_exited(now=4.0)
+    assert group.started == [0, 0]
+    group.restart_exited(now=4.5)
+    assert group.started == [0, 0, 0]
+
+
+def test_child_that_ran_long_enough_is_restarted_after_the_first_delay(group):
+    group.start(0)
+    group._failures[0] = 5
+    group.children[0].alive = False
+
+    group.restart_exited(now=STABLE_RUNTIME)
+    group.restart_exited(now=STABLE_RUNTIME + 1)
+
+    assert group.started == [0, 0]
+
+
+def test_retired_child_is_killed_after_kill_after(group):
+    group.start(0)
+    child = group.children[0]
+    with patch("app.core.supervision.time.monotonic", return_value=100.0):
+        group.retire(0)
+
+    assert group.children == {}
+    group.reap_retired(now=110.0)
+    assert not child.killed
+    group.reap_retired(now=110.5)
+    assert child.killed
+    assert group.retiring == {}
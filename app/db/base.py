@@ -1,19 +1,14 @@
 from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import settings
+from app.db.pool import engine_options
 
 DATABASE_URL = settings.database_url
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-)
+engine = create_async_engine(DATABASE_URL, echo=False, **engine_options(settings))
 
 async_session_factory = async_sessionmaker(
     engine,
@@ -23,6 +18,45 @@ async_session_factory = async_sessionmaker(
     autoflush=False,
 )
 
+read_engine = (
+    create_async_engine(settings.database_read_url, echo=False, **engine_options(settings))
+    if settings.database_read_url
+    else None
+)
+
+async_read_session_factory = (
+    async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+    if read_engine is not None
+    else None
+)
+
+_detached_engines: dict[AsyncEngine, AsyncEngine] = {}
+
+
+def detached_engine(bind: AsyncEngine) -> AsyncEngine:
+    # Work that outlives the request that started it (a cache load shared through single-flight)
+    # runs on a small pool of its own next to each engine. Taking its connection from the
+    # request pool would let a burst of requests, each holding one connection, wait on loads
+    # that queue for a second one until pool_timeout.
+    detached = _detached_engines.get(bind)
+    if detached is None:
+        options = {**engine_options(settings), "pool_size": settings.db_detached_pool_size, "max_overflow": 0}
+        detached = _detached_engines[bind] = create_async_engine(bind.url, echo=False, **options)
+    return detached
+
+
+async def dispose_detached_engines() -> None:
+    engines = list(_detached_engines.values())
+    _detached_engines.clear()
+    for detached in engines:
+        await detached.dispose()
+
 
 class Base(DeclarativeBase):
     pass
@@ -1,4 +1,5 @@
-from app.db.models.order import Order, OrderStatus
+from app.db.models.order import ACTIVE_ORDER_STATUSES, Order, OrderStatus
+from app.db.models.outbox import OutboxEvent
 from app.db.models.user import User
 
-__all__ = ["Order", "OrderStatus", "User"]
+__all__ = ["ACTIVE_ORDER_STATUSES", "Order", "OrderStatus", "OutboxEvent", "User"]
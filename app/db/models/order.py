@@ -2,7 +2,7 @@ import enum
 import uuid
 import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -16,6 +16,9 @@ class OrderStatus(str, enum.Enum):
     CANCELED = "CANCELED"
 
 
+ACTIVE_ORDER_STATUSES = (OrderStatus.PENDING.value, OrderStatus.PAID.value)
+
+
 class Order(Base):
     __tablename__ = "orders"
 
@@ -24,8 +27,28 @@ class Order(Base):
     items: Mapped[list] = mapped_column(JSONB, nullable=False, default=list)
     total_price: Mapped[float] = mapped_column(Float, nullable=False)
     status: Mapped[OrderStatus] = mapped_column(
-        String(20), nullable=False, default=OrderStatus.PENDING
+        String(20), nullable=False, default=OrderStatus.PENDING, server_default=OrderStatus.PENDING.value
+    )
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # bumped on every write; the ETag of GET /orders/{id}/
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
     )
-    created_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), default=datetime.datetime.now(datetime.UTC))
 
     user = relationship("User", back_populates="orders", lazy="raise")
+
+
+Index(
+    "ix_orders_user_id_created_at_id",
+    Order.user_id,
+    Order.created_at.desc(),
+    Order.id.desc(),
+)
+Index(
+    "ix_orders_active_created_at",
+    Order.created_at,
+    postgresql_where=Order.status.in_(ACTIVE_ORDER_STATUSES),
+)
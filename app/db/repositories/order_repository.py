@@ -1,6 +1,9 @@
+import datetime
 import uuid
+from collections.abc import AsyncIterator
 
-from sqlalchemy import select
+from sqlalchemy import Row, Select, any_, bindparam, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Order, OrderStatus
@@ -14,12 +17,31 @@ class OrderRepository:
         result = await self._session.execute(select(Order).where(Order.id == order_id))
         return result.scalar_one_or_none()
 
-    async def get_by_user_id(self, user_id: int) -> list[Order]:
-        result = await self._session.execute(
-            select(Order).where(Order.user_id == user_id).order_by(Order.created_at.desc())
-        )
+    async def get_by_ids(self, order_ids: list[uuid.UUID]) -> list[Order]:
+        # = ANY($1) with one array parameter: the same prepared statement for any batch size
+        ids = bindparam("order_ids", order_ids, type_=ARRAY(Order.id.type))
+        result = await self._session.execute(select(Order).where(Order.id == any_(ids)))
         return list(result.scalars().all())
 
+    async def get_by_user_id(
+        self,
+        user_id: int,
+        limit: int,
+        after: tuple[datetime.datetime, uuid.UUID] | None = None,
+    ) -> list[Order]:
+        query = _order_by_keyset(select(Order).where(Order.user_id == user_id))
+        if after is not None:
+            query = query.where(tuple_(Order.created_at, Order.id) < tuple_(*after))
+        result = await self._session.execute(query.limit(limit))
+        return list(result.scalars().all())
+
+    async def stream_by_user_id(self, user_id: int, batch_size: int = 500) -> AsyncIterator[Row]:
+        # Core rows instead of ORM entities: nothing is kept in the identity map while streaming
+        query = _order_by_keyset(select(Order.__table__).where(Order.user_id == user_id))
+        result = await self._session.stream(query.execution_options(yield_per=batch_size))
+        async for row in result:
+            yield row
+
     async def create(
         self,
         user_id: int,
@@ -27,22 +49,58 @@ class OrderRepository:
         total_price: float,
         status: OrderStatus = OrderStatus.PENDING,
     ) -> Order:
-        order = Order(
-            user_id=user_id,
-            items=items,
-            total_price=total_price,
-            status=status,
+        # id and created_at come back from the INSERT itself, no refresh round trip
+        result = await self._session.scalars(
+            insert(Order)
+            .values(user_id=user_id, items=items, total_price=total_price, status=status)
+            .returning(Order)
+        )
+        return result.one()
+
+    async def create_many(self, user_id: int, orders: list[dict]) -> list[Order]:
+        # one multi-row INSERT ... RETURNING for the whole list
+        result = await self._session.scalars(
+            insert(Order).returning(Order, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": user_id,
+                    "items": order["items"],
+                    "total_price": order["total_price"],
+                    "status": OrderStatus.PENDING,
+                }
+                for order in orders
+            ],
         )
-        self._session.add(order)
-        await self._session.flush()
-        await self._session.refresh(order)
-        return order
+        return list(result.all())
 
     async def update_status(self, order_id: uuid.UUID, status: OrderStatus) -> Order | None:
-        order = await self.get_by_id(order_id)
-        if order is None:
-            return None
-        order.status = status
-        await self._session.flush()
-        await self._session.refresh(order)
-        return order
+        result = await self._session.scalars(
+            update(Order)
+            .where(Order.id == order_id)
+            .values(status=status, version=Order.version + 1)
+            .returning(Order)
+            .execution_options(populate_existing=True)
+        )
+        return result.one_or_none()
+
+    async def advance_status(
+        self,
+        order_ids: list[uuid.UUID],
+        from_status: OrderStatus,
+        to_status: OrderStatus,
+    ) -> list[Order]:
+        # one statement per batch; orders no longer in from_status are left alone, so a retried
+        # or duplicated batch changes nothing and only the orders it moved come back
+        ids = bindparam("order_ids", order_ids, type_=ARRAY(Order.id.type))
+        result = await self._session.scalars(
+            update(Order)
+            .where(Order.id == any_(ids), Order.status == from_status)
+            .values(status=to_status, version=Order.version + 1)
+            .returning(Order)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.all())
+
+
+def _order_by_keyset(query: Select) -> Select:
+    return query.order_by(Order.created_at.desc(), Order.id.desc())
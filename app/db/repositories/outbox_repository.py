@@ -0,0 +1,42 @@
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import OutboxEvent
+
+
+class OutboxRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def add(self, topic: str, payload: dict, key: str | None = None) -> None:
+        await self._session.execute(
+            insert(OutboxEvent).values(topic=topic, key=key, payload=payload)
+        )
+
+    async def add_many(self, topic: str, events: list[tuple[dict, str | None]]) -> None:
+        await self._session.execute(
+            insert(OutboxEvent),
+            [{"topic": topic, "key": key, "payload": payload} for payload, key in events],
+        )
+
+    async def claim_batch(self, limit: int) -> list[OutboxEvent]:
+        # SKIP LOCKED lets several relays drain the table without publishing a row twice, and a
+        # transaction-level advisory lock per key hands all the events of a key to one relay at a
+        # time: events of a key locked elsewhere are skipped, so they can't overtake the ones
+        # that relay is still publishing
+        result = await self._session.execute(
+            select(OutboxEvent)
+            .where(
+                or_(
+                    OutboxEvent.key.is_(None),
+                    func.pg_try_advisory_xact_lock(func.hashtext(OutboxEvent.key)),
+                )
+            )
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
+
+    async def delete(self, event_ids: list[int]) -> None:
+        await self._session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(event_ids)))
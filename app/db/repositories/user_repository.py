@@ -1,4 +1,4 @@
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import User
@@ -17,8 +17,7 @@ class UserRepository:
         return result.scalar_one_or_none()
 
     async def create(self, email: str, password: str) -> User:
-        user = User(email=email, password=password)
-        self._session.add(user)
-        await self._session.flush()
-        await self._session.refresh(user)
-        return user
+        result = await self._session.scalars(
+            insert(User).values(email=email, password=password).returning(User)
+        )
+        return result.one()
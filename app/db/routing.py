@@ -0,0 +1,61 @@
+from collections.abc import AsyncGenerator
+
+import structlog
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.client import get_redis
+from app.cache.local import get_local_cache
+from app.core.config import settings
+from app.core.security import bearer_subject
+from app.db.base import async_read_session_factory, get_db_session
+
+PRIMARY_PIN_PREFIX = "db:primary-pin:"
+
+logger = structlog.get_logger(__name__)
+
+
+def _pin_key(user_id: int | str) -> str:
+    return f"{PRIMARY_PIN_PREFIX}{user_id}"
+
+
+async def pin_to_primary(user_id: int) -> None:
+    # kept locally too, so this worker doesn't need Redis to honour its own writes
+    window = settings.db_read_your_writes_window
+    if async_read_session_factory is None or not window:
+        return
+    key = _pin_key(user_id)
+    get_local_cache().set(key, True, ttl=window)
+    try:
+        await get_redis().set(key, 1, px=int(window * 1000))
+    except Exception:
+        logger.error('error pinning reads to primary', user_id=user_id)
+
+
+async def is_pinned_to_primary(user_id: int | str) -> bool:
+    key = _pin_key(user_id)
+    if get_local_cache().get(key):
+        return True
+    try:
+        return bool(await get_redis().exists(key))
+    except Exception:
+        # can't tell whether the user just wrote: the primary is always up to date
+        logger.error('error checking primary pin', user_id=user_id)
+        return True
+
+
+async def get_read_db_session(
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+) -> AsyncGenerator[AsyncSession, None]:
+    # Replica session for read-only work. Without a replica, or while the caller is pinned after
+    # a write, this is the request's primary session (no connection is taken until it's used).
+    if async_read_session_factory is None:
+        yield session
+        return
+    sub = bearer_subject(request.headers.get("authorization", ""))
+    if sub is not None and await is_pinned_to_primary(sub):
+        yield session
+        return
+    async with async_read_session_factory() as read_session:
+        yield read_session
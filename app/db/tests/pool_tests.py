@@ -0,0 +1,66 @@
+from collections.abc import Callable
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import Settings
+from app.db.pool import TimedQueuePool, engine_options
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def make_engine(db_engine) -> Callable[[Settings], AsyncEngine]:
+    # engines on the test database with the pool options the given settings produce
+    engines = []
+
+    def make(settings: Settings) -> AsyncEngine:
+        engine = create_async_engine(db_engine.url, **engine_options(settings))
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        await engine.dispose()
+
+
+async def test_engine_options_follow_settings():
+    options = engine_options(Settings(db_pool_size=7, db_pool_pre_ping=True, db_statement_cache_size=50))
+
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == 7
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"prepared_statement_cache_size": 50, "statement_cache_size": 50}
+
+
+async def test_pgbouncer_mode_disables_statement_caching():
+    connect_args = engine_options(Settings(db_pgbouncer=True, db_statement_cache_size=50))["connect_args"]
+
+    assert connect_args["prepared_statement_cache_size"] == 0
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_name_func"]() != connect_args["prepared_statement_name_func"]()
+
+
+async def test_pgbouncer_mode_runs_queries(make_engine):
+    engine = make_engine(Settings(db_pgbouncer=True))
+    async with engine.connect() as conn:
+        for _ in range(3):
+            assert await conn.scalar(text("SELECT 1")) == 1
+
+
+async def test_checkout_stats_count_waits_and_timeouts(make_engine):
+    engine = make_engine(Settings(db_pool_size=1, db_max_overflow=0, db_pool_timeout=0.05))
+    async with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            async with engine.connect():
+                pass
+    async with engine.connect() as conn:
+        await conn.scalar(text("SELECT 1"))
+
+    stats = engine.pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["checked_out"] == 0
+    assert stats["size"] == 1
+    assert stats["max_wait_ms"] >= stats["avg_wait_ms"] > 0
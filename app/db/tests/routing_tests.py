@@ -0,0 +1,89 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.requests import Request
+
+from app.cache.local import get_local_cache
+from app.core.security import create_access_token
+from app.db import routing
+from app.db.models import User
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def read_session_factory(monkeypatch, db_engine):
+    # the "replica" is a session of its own on the test database: it can't see the primary
+    # session's uncommitted writes, much like a lagging replica
+    factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(routing, "async_read_session_factory", factory)
+    get_local_cache().clear()
+    yield factory
+    get_local_cache().clear()
+
+
+@pytest.fixture
+def redis():
+    client = MagicMock()
+    client.exists = AsyncMock(return_value=0)
+    client.set = AsyncMock()
+    with patch("app.db.routing.get_redis", return_value=client):
+        yield client
+
+
+def request_for(user_id: int) -> Request:
+    token = create_access_token(data={"sub": str(user_id)})
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+async def read_session(request: Request, primary: AsyncSession) -> AsyncSession:
+    sessions = routing.get_read_db_session(request, primary)
+    session = await anext(sessions)
+    await sessions.aclose()
+    return session
+
+
+async def test_without_replica_reads_use_the_primary_session(db_session: AsyncSession):
+    assert await read_session(request_for(1), db_session) is db_session
+
+
+async def test_reads_go_to_replica_until_the_user_writes(read_session_factory, redis, db_session: AsyncSession):
+    user = User(email="reader@example.com", password="x")
+    db_session.add(user)
+    await db_session.flush()
+    request = request_for(user.id)
+
+    sessions = routing.get_read_db_session(request, db_session)
+    replica = await anext(sessions)
+    assert replica is not db_session
+    assert await replica.scalar(select(User).where(User.id == user.id)) is None
+    await sessions.aclose()
+
+    await routing.pin_to_primary(user.id)
+    redis.set.assert_awaited_once_with(f"db:primary-pin:{user.id}", 1, px=5000)
+    primary = await read_session(request, db_session)
+    assert primary is db_session
+    assert (await primary.scalar(select(User).where(User.id == user.id))).email == "reader@example.com"
+
+
+async def test_pin_from_another_worker_is_seen_through_redis(read_session_factory, redis, db_session: AsyncSession):
+    redis.exists.return_value = 1
+
+    assert await routing.is_pinned_to_primary(7)
+    assert await read_session(request_for(7), db_session) is db_session
+    redis.exists.assert_awaited_with("db:primary-pin:7")
+
+
+async def test_redis_errors_fall_back_to_the_primary(read_session_factory, redis, db_session: AsyncSession):
+    redis.exists.side_effect = ConnectionError
+
+    assert await read_session(request_for(7), db_session) is db_session
+
+
+async def test_anonymous_reads_go_to_replica(read_session_factory, redis, db_session: AsyncSession):
+    request = Request({"type": "http", "headers": []})
+
+    assert await read_session(request, db_session) is not db_session
+    redis.exists.assert_not_awaited()
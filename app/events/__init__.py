@@ -0,0 +1,3 @@
+from app.events.order_status import get_order_status_hub, publish_order_status, publish_order_statuses
+
+__all__ = ["get_order_status_hub", "publish_order_status", "publish_order_statuses"]
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+
+import structlog
+
+from app.cache.client import get_redis
+from app.core.config import settings
+from app.db.models import Order
+
+ORDER_STATUS_CHANNEL = "orders:status"
+RECONNECT_DELAY = 1.0
+
+logger = structlog.get_logger(__name__)
+
+
+def encode_order_status(order: Order) -> bytes:
+    return json.dumps(
+        {
+            "order_id": str(order.id),
+            "user_id": order.user_id,
+            "status": order.status,
+            "version": order.version,
+            "updated_at": order.updated_at.isoformat(),
+        }
+    ).encode("utf-8")
+
+
+async def publish_order_status(order: Order) -> None:
+    try:
+        await get_redis().publish(ORDER_STATUS_CHANNEL, encode_order_status(order))
+    except Exception:
+        logger.error('error publishing order status', order_id=str(order.id))
+
+
+async def publish_order_statuses(orders: list[Order]) -> None:
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for order in orders:
+                pipe.publish(ORDER_STATUS_CHANNEL, encode_order_status(order))
+            await pipe.execute()
+    except Exception:
+        logger.error('error publishing order statuses', count=len(orders))
+
+
+class OrderStatusHub:
+    # Fans status events of one Redis subscription out to every open stream in this process.
+    # A stream is just a bounded queue here, so idle connections cost next to nothing; a client
+    # too slow to drain its queue loses events and can catch up with a GET.
+    def __init__(self, queue_size: int) -> None:
+        self._queue_size = queue_size
+        self._subscribers: dict[int, set[asyncio.Queue[bytes]]] = {}
+
+    @contextmanager
+    def subscribe(self, user_id: int) -> Iterator[asyncio.Queue[bytes]]:
+        queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers[user_id]
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def dispatch(self, data: bytes) -> None:
+        try:
+            user_id = json.loads(data)["user_id"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning('invalid order status event')
+            return
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                logger.warning('order status stream lagging, event dropped', user_id=user_id)
+
+    def __len__(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+_hub: OrderStatusHub | None = None
+
+
+def get_order_status_hub() -> OrderStatusHub:
+    global _hub
+    if _hub is None:
+        _hub = OrderStatusHub(queue_size=settings.order_events_queue_size)
+    return _hub
+
+
+async def listen_for_order_status() -> None:
+    hub = get_order_status_hub()
+    while True:
+        pubsub = get_redis().pubsub()
+        try:
+            await pubsub.subscribe(ORDER_STATUS_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    hub.dispatch(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.error('order status listener disconnected')
+            await asyncio.sleep(RECONNECT_DELAY)
+        finally:
+            await pubsub.aclose()
+
+
+async def stream_order_status(
+    hub: OrderStatusHub,
+    user_id: int,
+    heartbeat_interval: float,
+) -> AsyncIterator[bytes]:
+    with hub.subscribe(user_id) as queue:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=heartbeat_interval)
+            except TimeoutError:
+                # keeps proxies from closing the idle connection
+                yield b": keep-alive\n\n"
+                continue
+            yield b"event: order_status\ndata: " + data + b"\n\n"
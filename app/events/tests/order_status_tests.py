@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+
+from app.events.order_status import OrderStatusHub, stream_order_status
+
+pytestmark = pytest.mark.asyncio
+
+
+def event(user_id: int, status: str = "PAID") -> bytes:
+    return json.dumps({"order_id": "o-1", "user_id": user_id, "status": status}).encode("utf-8")
+
+
+async def test_dispatch_reaches_only_the_owner():
+    hub = OrderStatusHub(queue_size=10)
+    with hub.subscribe(1) as first, hub.subscribe(1) as second, hub.subscribe(2) as other:
+        hub.dispatch(event(1))
+
+        assert first.get_nowait() == event(1)
+        assert second.get_nowait() == event(1)
+        assert other.empty()
+        assert len(hub) == 3
+    assert len(hub) == 0
+
+
+async def test_lagging_subscriber_drops_events():
+    hub = OrderStatusHub(queue_size=1)
+    with hub.subscribe(1) as queue:
+        hub.dispatch(event(1, "PAID"))
+        hub.dispatch(event(1, "SHIPPED"))
+        hub.dispatch(b"not json")
+
+        assert queue.qsize() == 1
+        assert json.loads(queue.get_nowait())["status"] == "PAID"
+
+
+async def test_stream_sends_events_and_keep_alives():
+    hub = OrderStatusHub(queue_size=10)
+    stream = stream_order_status(hub, 1, heartbeat_interval=0.01)
+
+    assert await anext(stream) == b"retry: 3000\n\n"
+    assert await anext(stream) == b": keep-alive\n\n"
+    hub.dispatch(event(1))
+    assert await anext(stream) == b"event: order_status\ndata: " + event(1) + b"\n\n"
+
+    await stream.aclose()
+    assert len(hub) == 0
+
+
+async def test_disconnect_unsubscribes():
+    hub = OrderStatusHub(queue_size=10)
+    stream = stream_order_status(hub, 1, heartbeat_interval=60)
+    await anext(stream)
+    pending = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0)
+    assert len(hub) == 1
+
+    pending.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await pending
+    await stream.aclose()
+    assert len(hub) == 0
@@ -1,38 +1,131 @@
 import asyncio
 import json
+import signal
+import time
+from collections.abc import Awaitable, Callable, Iterable
+
 import structlog
-from aiokafka import AIOKafkaConsumer
+from aiokafka import AIOKafkaConsumer, ConsumerRebalanceListener, ConsumerRecord, TopicPartition
 
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.tasks.broker import broker
 from app.tasks.order_tasks import process_order_task
 
+ENQUEUE_RETRY_DELAY = 1.0
+
 logger = structlog.get_logger(__name__)
 
 
+def decode_order_lanes(records: Iterable[ConsumerRecord]) -> list[list[str]]:
+    # Records of one partition and key (one user) form a lane that is enqueued strictly in offset
+    # order; different lanes are enqueued concurrently.
+    lanes: dict[tuple[int, bytes | None], list[str]] = {}
+    for record in records:
+        # tombstones (None), undecodable bytes and non-object JSON are skipped, never retried
+        try:
+            order_id = json.loads(record.value).get("order_id")
+        except (TypeError, ValueError, AttributeError) as e:
+            logger.warning("invalid_message", error=str(e), partition=record.partition, offset=record.offset)
+            continue
+        if order_id:
+            lanes.setdefault((record.partition, record.key), []).append(order_id)
+    return list(lanes.values())
+
+
+async def _kiq_process_order(order_id: str) -> None:
+    await process_order_task.kiq(order_id=order_id)
+
+
+async def enqueue_order_tasks(
+    lanes: list[list[str]],
+    concurrency: int,
+    enqueue: Callable[[str], Awaitable[None]] = _kiq_process_order,
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def enqueue_lane(lane: list[str]) -> None:
+        for order_id in lane:
+            async with semaphore:
+                await enqueue(order_id)
+
+    await asyncio.gather(*(enqueue_lane(lane) for lane in lanes))
+
+
+class FinishBatchOnRevokeListener(ConsumerRebalanceListener):
+    def __init__(self, processing: asyncio.Lock) -> None:
+        self._processing = processing
+
+    async def on_partitions_revoked(self, revoked: set[TopicPartition]) -> None:
+        # Waits for the batch in flight, which commits its own offsets (or rewinds on failure),
+        # before the partitions move to another consumer. Nothing is committed here: records
+        # fetched but not yet processed must not be marked consumed.
+        async with self._processing:
+            logger.info("partitions_revoked", partitions=sorted(tp.partition for tp in revoked))
+
+    async def on_partitions_assigned(self, assigned: set[TopicPartition]) -> None:
+        logger.info("partitions_assigned", partitions=sorted(tp.partition for tp in assigned))
+
+
 async def run_consumer() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    processing = asyncio.Lock()
     consumer = AIOKafkaConsumer(
-        settings.kafka_new_order_topic,
         bootstrap_servers=settings.kafka_bootstrap_servers.split(","),
         group_id="order-processor",
         auto_offset_reset="earliest",
+        enable_auto_commit=False,
+        max_poll_records=settings.kafka_consumer_batch_size,
     )
+    consumer.subscribe([settings.kafka_new_order_topic], listener=FinishBatchOnRevokeListener(processing))
     await broker.startup()
     await consumer.start()
     try:
-        async for msg in consumer:
-            try:
-                payload = json.loads(msg.value.decode("utf-8"))
-                order_id = payload.get("order_id")
-                if order_id:
-                    await process_order_task.kiq(order_id=order_id)
-                    logger.info("enqueued_process_order_task", order_id=order_id)
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.warning("invalid_message", error=str(e))
+        # on SIGTERM the current batch is still enqueued and committed before shutting down
+        while not stop.is_set():
+            batches = await consumer.getmany(
+                timeout_ms=settings.kafka_consumer_batch_timeout_ms,
+                max_records=settings.kafka_consumer_batch_size,
+            )
+            if not batches:
+                continue
+            async with processing:
+                await _process_batch(consumer, batches)
     finally:
         await consumer.stop()
         await broker.shutdown()
+        logger.info("consumer_stopped")
+
+
+async def _process_batch(
+    consumer: AIOKafkaConsumer,
+    batches: dict[TopicPartition, list[ConsumerRecord]],
+) -> None:
+    records = [record for partition_records in batches.values() for record in partition_records]
+    started = time.perf_counter()
+    lanes = decode_order_lanes(records)
+    try:
+        await enqueue_order_tasks(lanes, settings.kafka_consumer_enqueue_concurrency)
+    except Exception:
+        logger.exception("batch_enqueue_failed", size=len(records))
+        # rewind to the start of the batch so it is retried instead of skipped
+        for partition, partition_records in batches.items():
+            consumer.seek(partition, partition_records[0].offset)
+        await asyncio.sleep(ENQUEUE_RETRY_DELAY)
+        return
+    # offsets are committed only after every task of the batch is in the queue
+    await consumer.commit()
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "batch_enqueued",
+        size=len(records),
+        enqueued=sum(len(lane) for lane in lanes),
+        msgs_per_sec=round(len(records) / elapsed) if elapsed else None,
+    )
 
 
 def main() -> None:
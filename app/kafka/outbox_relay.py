@@ -0,0 +1,88 @@
+import asyncio
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.db.base import async_session_factory
+from app.db.repositories.outbox_repository import OutboxRepository
+from app.kafka.producer import (
+    BufferedPublisher,
+    close_kafka_producer,
+    encode_event,
+    get_kafka_producer,
+)
+
+logger = structlog.get_logger(__name__)
+
+
+async def relay_outbox_batch(
+    session_factory: async_sessionmaker[AsyncSession],
+    publisher: BufferedPublisher,
+    batch_size: int,
+) -> int:
+    errors: dict[int, BaseException | None] = {}
+
+    def on_delivery(event_id: int, error: BaseException | None) -> None:
+        errors[event_id] = error
+        if error is not None:
+            logger.warning("outbox_event_not_delivered", event_id=event_id, error=str(error))
+
+    async with session_factory() as session:
+        async with session.begin():
+            repository = OutboxRepository(session)
+            events = await repository.claim_batch(batch_size)
+            if not events:
+                return 0
+            # enqueue the whole batch before waiting, so the producer can batch and compress it
+            for event in events:
+                await publisher.publish(
+                    event.topic,
+                    value=encode_event(event.payload),
+                    key=event.key.encode("utf-8") if event.key is not None else None,
+                    on_delivery=lambda _, error, event_id=event.id: on_delivery(event_id, error),
+                )
+            await publisher.flush()
+            # rows are only removed once Kafka acked them; a crash before this point republishes.
+            # Events of one key must arrive in order, so from a key's first failed event on every
+            # event of that key stays, delivered or not, and the next batch sends them all again
+            failed_keys: set[str] = set()
+            delivered: list[int] = []
+            for event in events:
+                if event.id not in errors or errors[event.id] is not None:
+                    if event.key is not None:
+                        failed_keys.add(event.key)
+                elif event.key is None or event.key not in failed_keys:
+                    delivered.append(event.id)
+            if delivered:
+                await repository.delete(delivered)
+    logger.info("outbox_batch_published", count=len(delivered), kept=len(events) - len(delivered))
+    return len(delivered)
+
+
+async def run_outbox_relay() -> None:
+    producer = await get_kafka_producer()
+    publisher = BufferedPublisher(producer, settings.kafka_producer_max_in_flight)
+    try:
+        while True:
+            try:
+                published = await relay_outbox_batch(
+                    async_session_factory, publisher, settings.outbox_batch_size
+                )
+            except Exception:
+                logger.exception("outbox_relay_failed")
+                published = 0
+            if published < settings.outbox_batch_size:
+                await asyncio.sleep(settings.outbox_poll_interval)
+    finally:
+        await close_kafka_producer()
+
+
+def main() -> None:
+    setup_logging(log_level=settings.log_level)
+    asyncio.run(run_outbox_relay())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
+import asyncio
 import json
+from collections.abc import Callable
 from datetime import datetime, timezone
 from uuid import UUID
 
 from aiokafka import AIOKafkaProducer
+from aiokafka.structs import RecordMetadata
 
 from app.core.config import settings
 
+DeliveryCallback = Callable[[RecordMetadata | None, BaseException | None], None]
+
 _producer: AIOKafkaProducer | None = None
 
 
@@ -14,6 +19,9 @@ async def get_kafka_producer() -> AIOKafkaProducer:
     if _producer is None:
         _producer = AIOKafkaProducer(
             bootstrap_servers=settings.kafka_bootstrap_servers.split(","),
+            linger_ms=settings.kafka_producer_linger_ms,
+            max_batch_size=settings.kafka_producer_max_batch_size,
+            compression_type=settings.kafka_producer_compression or None,
         )
         await _producer.start()
     return _producer
@@ -26,14 +34,67 @@ async def close_kafka_producer() -> None:
         _producer = None
 
 
-async def send_new_order_event(order_id: UUID, user_id: int) -> None:
-    producer = await get_kafka_producer()
-    payload = {
+class BufferedPublisher:
+    # Fire-and-forget sends: publish() returns as soon as the record is in the producer's batch,
+    # delivery is reported through callbacks, and at most max_in_flight records wait for an ack
+    # (further publish() calls block until a slot frees up).
+    def __init__(self, producer: AIOKafkaProducer, max_in_flight: int) -> None:
+        self._producer = producer
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._pending: set[asyncio.Future] = set()
+        # set once every delivery callback has run, not just once the sends are acked: a done
+        # future's callbacks are only scheduled, so awaiting the futures can return before them
+        self._delivered = asyncio.Event()
+        self._delivered.set()
+
+    async def publish(
+        self,
+        topic: str,
+        value: bytes,
+        key: bytes | None = None,
+        on_delivery: DeliveryCallback | None = None,
+    ) -> None:
+        await self._slots.acquire()
+        try:
+            delivery = await self._producer.send(topic, value=value, key=key)
+        except BaseException:
+            self._slots.release()
+            raise
+        self._pending.add(delivery)
+        self._delivered.clear()
+        delivery.add_done_callback(lambda done: self._on_done(done, on_delivery))
+
+    async def flush(self) -> None:
+        await self._delivered.wait()
+
+    def _on_done(self, delivery: asyncio.Future, on_delivery: DeliveryCallback | None) -> None:
+        self._slots.release()
+        if delivery.cancelled():
+            error, metadata = asyncio.CancelledError(), None
+        else:
+            error = delivery.exception()
+            metadata = delivery.result() if error is None else None
+        try:
+            if on_delivery is not None:
+                on_delivery(metadata, error)
+        finally:
+            self._pending.discard(delivery)
+            if not self._pending:
+                self._delivered.set()
+
+
+def build_new_order_event(order_id: UUID, user_id: int) -> dict:
+    return {
         "order_id": str(order_id),
         "user_id": user_id,
         "created_at": datetime.now(timezone.utc).isoformat(),
     }
-    await producer.send_and_wait(
-        settings.kafka_new_order_topic,
-        value=json.dumps(payload).encode("utf-8"),
-    )
+
+
+def new_order_event_key(user_id: int) -> str:
+    # all events of a user land on one partition, so consumers see them in order
+    return str(user_id)
+
+
+def encode_event(payload: dict) -> bytes:
+    return json.dumps(payload).encode("utf-8")
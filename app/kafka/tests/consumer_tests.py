@@ -0,0 +1,115 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiokafka import ConsumerRecord, TopicPartition
+
+from app.kafka.consumer import _process_batch, decode_order_lanes, enqueue_order_tasks
+
+
+def make_record(
+    offset: int, value: bytes | None, key: bytes | None = None, partition: int = 0
+) -> ConsumerRecord:
+    return ConsumerRecord(
+        topic="new_order",
+        partition=partition,
+        offset=offset,
+        timestamp=0,
+        timestamp_type=0,
+        key=key,
+        value=value,
+        checksum=None,
+        serialized_key_size=0,
+        serialized_value_size=len(value) if value is not None else -1,
+        headers=(),
+    )
+
+
+def test_decode_order_lanes_skips_invalid_messages():
+    records = [
+        make_record(0, json.dumps({"order_id": "a"}).encode("utf-8")),
+        make_record(1, b"not json"),
+        make_record(2, json.dumps({"user_id": 1}).encode("utf-8")),
+        make_record(3, json.dumps(["order_id"]).encode("utf-8")),
+        make_record(4, json.dumps({"order_id": "b"}).encode("utf-8")),
+    ]
+
+    assert decode_order_lanes(records) == [["a", "b"]]
+
+
+def test_decode_order_lanes_skips_tombstones_and_non_objects():
+    records = [
+        make_record(0, None),
+        make_record(1, json.dumps("order_id").encode("utf-8")),
+        make_record(2, json.dumps(42).encode("utf-8")),
+        make_record(3, b"\xff\xfe"),
+        make_record(4, json.dumps({"order_id": "a"}).encode("utf-8")),
+    ]
+
+    assert decode_order_lanes(records) == [["a"]]
+
+
+def test_decode_order_lanes_groups_by_partition_and_key_in_offset_order():
+    def order(order_id: str) -> bytes:
+        return json.dumps({"order_id": order_id}).encode("utf-8")
+
+    records = [
+        make_record(0, order("u1-first"), key=b"1"),
+        make_record(1, order("u2-first"), key=b"2"),
+        make_record(2, order("u1-second"), key=b"1"),
+        make_record(0, order("p1-u1"), key=b"1", partition=1),
+    ]
+
+    assert decode_order_lanes(records) == [["u1-first", "u1-second"], ["u2-first"], ["p1-u1"]]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_order_tasks_respects_concurrency_limit():
+    running = peak = 0
+    enqueued = []
+
+    async def enqueue(order_id: str) -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        enqueued.append(order_id)
+        running -= 1
+
+    lanes = [[f"{lane}-{i}" for i in range(5)] for lane in range(8)]
+    await enqueue_order_tasks(lanes, concurrency=4, enqueue=enqueue)
+
+    assert peak == 4
+    for lane in lanes:
+        assert [order_id for order_id in enqueued if order_id in lane] == lane
+
+
+@pytest.mark.asyncio
+async def test_batch_with_tombstone_is_committed_not_retried():
+    partition = TopicPartition("new_order", 0)
+    batches = {partition: [make_record(7, None), make_record(8, json.dumps({"order_id": "a"}).encode("utf-8"))]}
+    consumer = MagicMock(commit=AsyncMock())
+
+    with patch("app.kafka.consumer.enqueue_order_tasks", new_callable=AsyncMock) as enqueue:
+        await _process_batch(consumer, batches)
+
+    assert enqueue.await_args.args[0] == [["a"]]
+    consumer.commit.assert_awaited_once()
+    consumer.seek.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_batch_is_rewound_when_enqueue_fails():
+    partition = TopicPartition("new_order", 0)
+    batches = {partition: [make_record(7, json.dumps({"order_id": "a"}).encode("utf-8"))]}
+    consumer = MagicMock(commit=AsyncMock())
+
+    with (
+        patch("app.kafka.consumer.enqueue_order_tasks", new_callable=AsyncMock, side_effect=ConnectionError),
+        patch("app.kafka.consumer.ENQUEUE_RETRY_DELAY", 0),
+    ):
+        await _process_batch(consumer, batches)
+
+    consumer.seek.assert_called_once_with(partition, 7)
+    consumer.commit.assert_not_called()
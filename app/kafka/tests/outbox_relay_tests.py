@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models import OutboxEvent, User
+from app.db.repositories.order_repository import OrderRepository
+from app.db.repositories.outbox_repository import OutboxRepository
+from app.kafka.outbox_relay import relay_outbox_batch
+from app.kafka.producer import BufferedPublisher
+from app.schemas.order import OrderCreate, OrderItem
+from app.services import order_service
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeProducer:
+    def __init__(self, fail: bool = False, fail_sends: set[int] = frozenset()) -> None:
+        self.fail = fail
+        self.fail_sends = fail_sends
+        self.sends = 0
+        self.sent: list[tuple[str, bytes, bytes | None]] = []
+
+    async def send(self, topic: str, value: bytes, key: bytes | None = None) -> asyncio.Future:
+        delivery = asyncio.get_running_loop().create_future()
+        self.sends += 1
+        if self.fail or self.sends in self.fail_sends:
+            delivery.set_exception(ConnectionError("broker unavailable"))
+        else:
+            self.sent.append((topic, value, key))
+            delivery.set_result(None)
+        return delivery
+
+
+@pytest.fixture
+def session_factory(db_engine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+async def committed_order(session_factory):
+    async with session_factory() as session, session.begin():
+        user = User(email="outbox@example.com", password="x")
+        session.add(user)
+        await session.flush()
+        order = await order_service.create_order(
+            OrderRepository(session),
+            OutboxRepository(session),
+            user_id=user.id,
+            order_data=OrderCreate(items=[OrderItem(name="item", quantity=1, price=2.5)]),
+        )
+    return order
+
+
+async def count_outbox(session_factory) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(func.count()).select_from(OutboxEvent))
+
+
+async def test_create_order_writes_outbox_event(session_factory, committed_order):
+    async with session_factory() as session:
+        event = await session.scalar(select(OutboxEvent))
+    assert event.topic == settings.kafka_new_order_topic
+    assert event.key == str(committed_order.user_id)
+    assert event.payload["order_id"] == str(committed_order.id)
+
+
+async def test_rolled_back_order_leaves_no_event(session_factory):
+    async with session_factory() as session:
+        user = User(email="rollback@example.com", password="x")
+        session.add(user)
+        await session.flush()
+        await order_service.create_order(
+            OrderRepository(session),
+            OutboxRepository(session),
+            user_id=user.id,
+            order_data=OrderCreate(items=[]),
+        )
+        await session.rollback()
+    assert await count_outbox(session_factory) == 0
+
+
+async def test_relay_publishes_and_removes_events(session_factory, committed_order):
+    producer = FakeProducer()
+    publisher = BufferedPublisher(producer, max_in_flight=100)
+
+    published = await relay_outbox_batch(session_factory, publisher, batch_size=10)
+
+    assert published == 1
+    topic, value, key = producer.sent[0]
+    assert topic == settings.kafka_new_order_topic
+    assert key == str(committed_order.user_id).encode("utf-8")
+    assert json.loads(value)["order_id"] == str(committed_order.id)
+    assert await count_outbox(session_factory) == 0
+    assert await relay_outbox_batch(session_factory, publisher, batch_size=10) == 0
+
+
+async def test_relay_keeps_events_when_publish_fails(session_factory, committed_order):
+    publisher = BufferedPublisher(FakeProducer(fail=True), max_in_flight=100)
+
+    assert await relay_outbox_batch(session_factory, publisher, batch_size=10) == 0
+    assert await count_outbox(session_factory) == 1
+
+
+async def test_relay_keeps_the_rest_of_a_key_after_a_failed_event(session_factory):
+    async with session_factory() as session, session.begin():
+        outbox = OutboxRepository(session)
+        for n in range(3):
+            await outbox.add("new_order", {"n": n}, key="1")
+        await outbox.add("new_order", {"n": 3}, key="2")
+    # the second event of key 1 fails; the third is acked, but must not overtake it
+    publisher = BufferedPublisher(FakeProducer(fail_sends={2}), max_in_flight=100)
+
+    assert await relay_outbox_batch(session_factory, publisher, batch_size=10) == 2
+
+    async with session_factory() as session:
+        kept = (await session.scalars(select(OutboxEvent).order_by(OutboxEvent.id))).all()
+    assert [(event.key, event.payload["n"]) for event in kept] == [("1", 1), ("1", 2)]
+
+    producer = FakeProducer()
+    assert await relay_outbox_batch(session_factory, BufferedPublisher(producer, max_in_flight=100), batch_size=10) == 2
+    assert [json.loads(value)["n"] for _, value, _ in producer.sent] == [1, 2]
+
+
+async def test_events_of_a_key_are_claimed_by_one_relay_at_a_time(session_factory):
+    async with session_factory() as session, session.begin():
+        await OutboxRepository(session).add_many("t", [({"n": n}, key) for n, key in enumerate("aabab")])
+
+    async with session_factory() as first, first.begin():
+        claimed = await OutboxRepository(first).claim_batch(2)
+        assert [event.key for event in claimed] == ["a", "a"]
+
+        async with session_factory() as second, second.begin():
+            # the third "a" comes after the two still being published, so it waits for them
+            others = await OutboxRepository(second).claim_batch(10)
+            assert [event.key for event in others] == ["b", "b"]
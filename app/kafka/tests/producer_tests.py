@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.kafka.producer import BufferedPublisher
+
+pytestmark = pytest.mark.asyncio
+
+
+class ManualProducer:
+    # every send returns a delivery future the test resolves by hand
+    def __init__(self) -> None:
+        self.deliveries: list[asyncio.Future] = []
+
+    async def send(self, topic: str, value: bytes, key: bytes | None = None) -> asyncio.Future:
+        delivery = asyncio.get_running_loop().create_future()
+        self.deliveries.append(delivery)
+        return delivery
+
+
+async def test_publish_blocks_at_max_in_flight():
+    producer = ManualProducer()
+    publisher = BufferedPublisher(producer, max_in_flight=2)
+
+    await publisher.publish("t", b"1")
+    await publisher.publish("t", b"2")
+    blocked = asyncio.create_task(publisher.publish("t", b"3"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    assert len(producer.deliveries) == 2
+
+    producer.deliveries[0].set_result(None)
+    await asyncio.wait_for(blocked, timeout=1)
+    assert len(producer.deliveries) == 3
+
+
+async def test_failed_delivery_is_reported_and_frees_its_slot():
+    producer = ManualProducer()
+    publisher = BufferedPublisher(producer, max_in_flight=1)
+    reported = []
+
+    await publisher.publish("t", b"1", on_delivery=lambda metadata, error: reported.append(error))
+    producer.deliveries[0].set_exception(ConnectionError("broker unavailable"))
+    await publisher.publish("t", b"2", on_delivery=lambda metadata, error: reported.append(error))
+    producer.deliveries[1].set_result("metadata")
+    await publisher.flush()
+
+    assert isinstance(reported[0], ConnectionError)
+    assert reported[1] is None
+
+
+async def test_flush_waits_for_every_delivery():
+    producer = ManualProducer()
+    publisher = BufferedPublisher(producer, max_in_flight=10)
+    for n in range(3):
+        await publisher.publish("t", str(n).encode())
+
+    flush = asyncio.create_task(publisher.flush())
+    for delivery in producer.deliveries[:2]:
+        delivery.set_result(None)
+    await asyncio.sleep(0.01)
+    assert not flush.done()
+
+    producer.deliveries[2].set_exception(ConnectionError("broker unavailable"))
+    await asyncio.wait_for(flush, timeout=1)
+
+
+async def test_send_error_frees_its_slot():
+    class FailingProducer:
+        async def send(self, topic: str, value: bytes, key: bytes | None = None) -> asyncio.Future:
+            raise ConnectionError("broker unavailable")
+
+    publisher = BufferedPublisher(FailingProducer(), max_in_flight=1)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(publisher.publish("t", b"1"), timeout=1)
+
+
+async def test_flush_returns_after_the_delivery_callbacks_of_finished_sends():
+    # the deliveries are already done when flush starts, but their callbacks haven't run yet
+    producer = ManualProducer()
+    publisher = BufferedPublisher(producer, max_in_flight=10)
+    reported = []
+    for n in range(2):
+        await publisher.publish("t", str(n).encode(), on_delivery=lambda metadata, error: reported.append(error))
+    producer.deliveries[0].set_result("metadata")
+    producer.deliveries[1].set_exception(ConnectionError("broker unavailable"))
+
+    await publisher.flush()
+
+    assert len(reported) == 2
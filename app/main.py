@@ -1,28 +1,57 @@
+import asyncio
+import math
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import JSONResponse
 
 from app.api.router import api_router
+from app.cache.client import close_redis
+from app.cache.invalidation import listen_for_invalidations
 from app.core.config import settings
-from app.core.limiter import limiter
+from app.core.limiter import RateLimitExceededError
 from app.core.logging import setup_logging
-from app.kafka.producer import close_kafka_producer, get_kafka_producer
+from app.core.security import PasswordHashingBusyError, shutdown_password_executor
+from app.db.base import dispose_detached_engines
+from app.events.order_status import listen_for_order_status
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging(log_level=settings.log_level)
-    await get_kafka_producer()
+    listeners = [
+        asyncio.create_task(listen_for_invalidations()),
+        asyncio.create_task(listen_for_order_status()),
+    ]
     yield
-    await close_kafka_producer()
+    for listener in listeners:
+        listener.cancel()
+    await asyncio.gather(*listeners, return_exceptions=True)
+    await close_redis()
+    await dispose_detached_engines()
+    shutdown_password_executor()
+
+
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusyError) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many concurrent logins, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceededError) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"error": f"Rate limit exceeded: {exc.rate}"},
+        headers={"Retry-After": str(max(math.ceil(exc.retry_after), 1))},
+    )
 
 
 app = FastAPI(title="Funtech Orders API", docs_url="/docs", lifespan=lifespan)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_exception_handler(RateLimitExceededError, rate_limit_exceeded_handler)
+app.add_exception_handler(PasswordHashingBusyError, password_hashing_busy_handler)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
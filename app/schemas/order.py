@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, computed_field, field_validator
+from pydantic import BaseModel, Field, computed_field, field_validator
 
 from app.db.models import OrderStatus
 
@@ -27,6 +27,20 @@ class OrderCreate(BaseModel):
         }
 
 
+ORDERS_BULK_MAX = 1000
+
+
+class OrderBulkCreate(BaseModel):
+    orders: list[OrderCreate] = Field(min_length=1, max_length=ORDERS_BULK_MAX)
+
+
+ORDERS_BATCH_MAX = 100
+
+
+class OrderBatchLookup(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=ORDERS_BATCH_MAX)
+
+
 class OrderUpdate(BaseModel):
     status: OrderStatus
 
@@ -38,6 +52,8 @@ class OrderResponse(BaseModel):
     total_price: float
     status: OrderStatus
     created_at: datetime
+    updated_at: datetime
+    version: int
 
     model_config = {"from_attributes": True}
 
@@ -47,3 +63,8 @@ class OrderResponse(BaseModel):
         if isinstance(v, list):
             return [OrderItem.model_validate(item) if isinstance(item, dict) else item for item in v]
         return v
+
+
+class OrderBatchResponse(BaseModel):
+    orders: list[OrderResponse]
+    missing: list[UUID]
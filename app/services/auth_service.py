@@ -1,6 +1,39 @@
-from app.core.security import get_password_hash, verify_password
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.decorators import cached_entity, invalidate_cache
+from app.core.config import settings
+from app.core.security import get_password_hash_async, verify_password_async
 from app.db.repositories.user_repository import UserRepository
 from app.db.models import User
+from app.schemas.auth import UserResponse
+
+USER_CACHE_TTL = 60
+
+logger = structlog.get_logger(__name__)
+
+
+@cached_entity(
+    key_prefix="user:",
+    key_param_name="user_id",
+    response_model=UserResponse,
+    ttl=USER_CACHE_TTL,
+    local_ttl=settings.local_cache_ttl,
+)
+async def get_user(
+    user_id: int,
+    session: AsyncSession,
+) -> UserResponse | None:
+    repository = UserRepository(session)
+    user = await repository.get_by_id(user_id)
+    if user is None:
+        logger.warning('user not found', user_id=user_id)
+        return None
+    return UserResponse.model_validate(user)
+
+
+async def invalidate_user_cache(user_id: int) -> None:
+    await invalidate_cache(f"user:{user_id}")
 
 
 async def register_user(
@@ -8,7 +41,7 @@ async def register_user(
     email: str,
     password: str,
 ) -> User:
-    hashed = get_password_hash(password)
+    hashed = await get_password_hash_async(password)
     return await repository.create(email=email, password=hashed)
 
 
@@ -20,6 +53,6 @@ async def authenticate_user(
     user = await repository.get_by_email(email)
     if user is None:
         return None
-    if not verify_password(password, user.password):
+    if not await verify_password_async(password, user.password):
         return None
     return user
@@ -0,0 +1,90 @@
+import asyncio
+from collections.abc import Iterable
+from uuid import UUID
+
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache.bloom import RedisBloomFilter
+from app.cache.client import close_redis, get_redis
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.db.base import async_session_factory, engine
+from app.db.models import Order
+
+ORDER_ID_FILTER_KEY = "orders:ids:bloom"
+REBUILD_BATCH_SIZE = 10_000
+# requests that added an order id just before the rebuild started may still be uncommitted,
+# and invisible to its scan; give them time to commit first
+REBUILD_GRACE_PERIOD = 5.0
+
+_order_id_filter: RedisBloomFilter | None = None
+
+logger = structlog.get_logger(__name__)
+
+
+def get_order_id_filter() -> RedisBloomFilter:
+    global _order_id_filter
+    if _order_id_filter is None:
+        _order_id_filter = RedisBloomFilter(
+            ORDER_ID_FILTER_KEY,
+            capacity=settings.order_id_filter_capacity,
+            error_rate=settings.order_id_filter_error_rate,
+        )
+    return _order_id_filter
+
+
+async def remember_order_ids(order_ids: Iterable[UUID]) -> None:
+    if not settings.order_id_filter_enabled:
+        return
+    bloom = get_order_id_filter()
+    try:
+        await bloom.add_many(order_id.bytes for order_id in order_ids)
+    except Exception:
+        # a filter missing these ids would answer 404 for them: drop it, reads then skip it
+        logger.error('error adding order ids to filter, dropping it', key=bloom.key)
+        try:
+            await get_redis().delete(bloom.key)
+        except Exception:
+            logger.error('error dropping order id filter, rebuild it', key=bloom.key)
+
+
+async def order_may_exist(order_id: UUID) -> bool:
+    if not settings.order_id_filter_enabled:
+        return True
+    return await get_order_id_filter().might_contain(order_id.bytes)
+
+
+async def rebuild_order_id_filter(session: AsyncSession, grace_period: float = REBUILD_GRACE_PERIOD) -> int:
+    bloom = get_order_id_filter()
+    await bloom.start_rebuild()
+    await asyncio.sleep(grace_period)
+    count = 0
+    result = await session.stream_scalars(select(Order.id).execution_options(yield_per=REBUILD_BATCH_SIZE))
+    async for batch in result.partitions():
+        await bloom.add_to_rebuild(order_id.bytes for order_id in batch)
+        count += len(batch)
+    await bloom.finish_rebuild()
+    logger.info('order id filter rebuilt', key=bloom.key, orders=count, bits=bloom.size, hashes=bloom.hashes)
+    return count
+
+
+async def run() -> None:
+    setup_logging(log_level=settings.log_level)
+    try:
+        async with async_session_factory() as session:
+            await rebuild_order_id_filter(session)
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+
+def main() -> None:
+    # python -m app.services.order_id_filter: needed once after enabling the filter, and again
+    # whenever its Redis key is lost (until then reads don't consult it)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,181 @@
+import base64
+import datetime
+import json
 import uuid
+from collections.abc import AsyncIterator
 from uuid import UUID
+
 import structlog
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.cache.decorators import cached_entity
+from app.cache.decorators import cached_entity, invalidate_cache, invalidate_cache_many
+from app.cache.rendered import RenderedEntity, cached_rendered, invalidate_rendered, invalidate_rendered_many
+from app.core.config import settings
 from app.db.models import Order, OrderStatus
 from app.db.repositories.order_repository import OrderRepository
-from app.schemas.order import OrderCreate, OrderResponse
+from app.db.repositories.outbox_repository import OutboxRepository
+from app.events.order_status import publish_order_status
+from app.services.order_id_filter import order_may_exist, remember_order_ids
+from app.kafka.producer import build_new_order_event, new_order_event_key
+from app.schemas.order import OrderBulkCreate, OrderCreate, OrderResponse
 
 
 ORDER_DETAIL_CACHE_TTL = 300
+# Bump when the cached order shape changes: entries an older deploy wrote then sit under keys
+# nobody reads until they expire. The stale-while-revalidate wrapping is part of the shape.
+ORDER_CACHE_SCHEMA = 2
+ORDER_CACHE_KEY_PREFIX = f"order:v{ORDER_CACHE_SCHEMA}{':swr' if settings.order_cache_stale_ttl else ''}:"
+ORDER_RENDERED_KEY_PREFIX = f"order:rendered:v{ORDER_CACHE_SCHEMA}:"
+ORDERS_PAGE_DEFAULT_LIMIT = 50
+ORDERS_PAGE_MAX_LIMIT = 500
 
 logger = structlog.get_logger(__name__)
 
 
 @cached_entity(
-    key_prefix="order:",
+    key_prefix=ORDER_CACHE_KEY_PREFIX,
     key_param_name="order_id",
-    response_model=OrderResponse,
     ttl=ORDER_DETAIL_CACHE_TTL,
+    stale_ttl=settings.order_cache_stale_ttl,
+    local_ttl=settings.local_cache_ttl,
+    version_key="version",
+    negative_ttl=settings.order_cache_negative_ttl,
 )
 async def get_order(
     order_id: UUID,
     session: AsyncSession,
-) -> OrderResponse | None:
+) -> dict | None:
+    if not await order_may_exist(order_id):
+        return None
     repository = OrderRepository(session)
     order = await repository.get_by_id(order_id)
     if order is None:
         logger.error('order not found', order_id=order_id)
         return None
-    return OrderResponse.model_validate(order)
+    # cached and returned as a JSON-ready dict: hits are rendered without going through Pydantic
+    return OrderResponse.model_validate(order).model_dump(mode="json")
+
+
+@cached_rendered(
+    key_prefix=ORDER_RENDERED_KEY_PREFIX,
+    key_param_name="order_id",
+    ttl=ORDER_DETAIL_CACHE_TTL,
+    local_ttl=settings.local_cache_ttl,
+    version_key="version",
+)
+async def get_order_rendered(
+    order_id: UUID,
+    session: AsyncSession,
+) -> RenderedEntity | None:
+    if not await order_may_exist(order_id):
+        return None
+    repository = OrderRepository(session)
+    order = await repository.get_by_id(order_id)
+    if order is None:
+        logger.error('order not found', order_id=order_id)
+        return None
+    response = OrderResponse.model_validate(order)
+    return RenderedEntity(
+        body=response.model_dump_json().encode("utf-8"),
+        meta={
+            "user_id": response.user_id,
+            "version": response.version,
+            "updated_at": response.updated_at.isoformat(),
+        },
+    )
+
+
+async def get_orders(
+    order_ids: list[UUID],
+    session: AsyncSession,
+) -> dict[UUID, dict]:
+    # cached orders come from one MGET, all the others from one query
+    async def load_many(missing: list[UUID]) -> dict[UUID, dict]:
+        orders = await OrderRepository(session).get_by_ids(missing)
+        return {order.id: OrderResponse.model_validate(order).model_dump(mode="json") for order in orders}
+
+    return await get_order.get_many(order_ids, load_many)
+
+
+async def invalidate_order_cache(order: Order) -> None:
+    await invalidate_cache(f"{ORDER_CACHE_KEY_PREFIX}{order.id}")
+    await invalidate_rendered(f"{ORDER_RENDERED_KEY_PREFIX}{order.id}", order.version, ttl=ORDER_DETAIL_CACHE_TTL)
+
+
+async def invalidate_orders_cache(orders: list[Order]) -> None:
+    # the rendered entries get version tombstones, so renders still in flight can't store the
+    # status these orders had before
+    await invalidate_cache_many([f"{ORDER_CACHE_KEY_PREFIX}{order.id}" for order in orders])
+    await invalidate_rendered_many(
+        {f"{ORDER_RENDERED_KEY_PREFIX}{order.id}": order.version for order in orders}, ttl=ORDER_DETAIL_CACHE_TTL
+    )
+
+
+async def refresh_order_cache(order: Order) -> None:
+    # write-through: the clients polling an order right after a change read it from cache
+    if not settings.order_cache_write_through:
+        await invalidate_order_cache(order)
+        return
+    await get_order.write_through(order.id, OrderResponse.model_validate(order).model_dump(mode="json"))
+    await invalidate_rendered(f"{ORDER_RENDERED_KEY_PREFIX}{order.id}", order.version, ttl=ORDER_DETAIL_CACHE_TTL)
+
+
+async def announce_order_update(order: Order) -> None:
+    # only once the update has committed: neither the cache nor a stream subscriber refetching
+    # on the event may see a version that could still roll back
+    await refresh_order_cache(order)
+    # pushed to GET /orders/events/ streams of the owner on every API worker
+    await publish_order_status(order)
+
+
+async def announce_new_orders(orders: list[Order]) -> None:
+    # after the commit (a rolled-back create must leave nothing behind) but before the response:
+    # the id is unknown to anyone until then, so the client's first read can neither be rejected
+    # by the id filter nor find the order cached as missing
+    await remember_order_ids(order.id for order in orders)
+    if settings.order_cache_negative_ttl:
+        await get_order.prime(
+            [(order.id, OrderResponse.model_validate(order).model_dump(mode="json")) for order in orders]
+        )
 
 
 async def create_order(
     repository: OrderRepository,
+    outbox: OutboxRepository,
     user_id: int,
     order_data: OrderCreate,
 ) -> Order:
     order_dict = order_data.to_dict()
-    return await repository.create(
+    order = await repository.create(
         user_id=user_id,
         items=order_dict["items"],
         total_price=order_dict["total_price"],
         status=OrderStatus.PENDING,
     )
+    # written in the order's transaction: the event exists if and only if the order commits
+    await outbox.add(
+        settings.kafka_new_order_topic,
+        build_new_order_event(order.id, user_id),
+        key=new_order_event_key(user_id),
+    )
+    return order
+
+
+async def create_orders_bulk(
+    repository: OrderRepository,
+    outbox: OutboxRepository,
+    user_id: int,
+    bulk_data: OrderBulkCreate,
+) -> list[Order]:
+    orders = await repository.create_many(
+        user_id=user_id,
+        orders=[order_data.to_dict() for order_data in bulk_data.orders],
+    )
+    await outbox.add_many(
+        settings.kafka_new_order_topic,
+        [(build_new_order_event(order.id, user_id), new_order_event_key(user_id)) for order in orders],
+    )
+    return orders
 
 
 async def update_order_status(
@@ -54,8 +186,45 @@ async def update_order_status(
     return await repository.update_status(order_id, status)
 
 
+async def process_orders(
+    repository: OrderRepository,
+    order_ids: list[uuid.UUID],
+) -> list[Order]:
+    # the worker stage: new orders move PENDING -> PAID; anything already past it stays as is
+    return await repository.advance_status(order_ids, OrderStatus.PENDING, OrderStatus.PAID)
+
+
+def encode_order_cursor(order: Order) -> str:
+    raw = json.dumps([order.created_at.isoformat(), str(order.id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_order_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    try:
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(order_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
 async def get_orders_by_user_id(
     repository: OrderRepository,
     user_id: int,
-) -> list[Order]:
-    return await repository.get_by_user_id(user_id)
+    limit: int = ORDERS_PAGE_DEFAULT_LIMIT,
+    cursor: str | None = None,
+) -> tuple[list[Order], str | None]:
+    after = decode_order_cursor(cursor) if cursor else None
+    # one extra row tells us whether there is a next page without a COUNT query
+    orders = await repository.get_by_user_id(user_id, limit=limit + 1, after=after)
+    if len(orders) <= limit:
+        return orders, None
+    orders = orders[:limit]
+    return orders, encode_order_cursor(orders[-1])
+
+
+async def stream_orders_by_user_id(
+    repository: OrderRepository,
+    user_id: int,
+) -> AsyncIterator[bytes]:
+    async for row in repository.stream_by_user_id(user_id):
+        yield OrderResponse.model_validate(row).model_dump_json().encode("utf-8") + b"\n"
@@ -1,3 +1,4 @@
+from taskiq import SimpleRetryMiddleware
 from taskiq_redis import ListQueueBroker
 
 from app.core.config import settings
@@ -5,4 +6,7 @@ from app.core.logging import setup_logging
 
 setup_logging(log_level=settings.log_level)
 
-broker = ListQueueBroker(url=settings.redis_url)
+# tasks labelled retry_on_error are re-enqueued when they raise
+broker = ListQueueBroker(url=settings.redis_url, queue_name=settings.taskiq_queue_name).with_middlewares(
+    SimpleRetryMiddleware()
+)
@@ -0,0 +1,116 @@
+import asyncio
+import time
+import uuid
+from collections.abc import Callable
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.base import async_session_factory
+from app.db.repositories.order_repository import OrderRepository
+from app.events.order_status import publish_order_statuses
+from app.services import order_service
+
+_processor: "OrderBatchProcessor | None" = None
+
+logger = structlog.get_logger(__name__)
+
+
+class OrderBatchProcessor:
+    # Tasks running concurrently in a worker hand their order ids to one processor, which moves
+    # them in micro-batches: up to batch_size ids, or whatever arrived within linger seconds of
+    # the first. Each batch is one UPDATE, one commit, one cache DEL and one publish pipeline;
+    # every submitter gets back whether its order was moved by this batch.
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        batch_size: int,
+        linger: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._linger = linger
+        self._pending: dict[uuid.UUID, list[asyncio.Future[bool]]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushing: set[asyncio.Task] = set()
+        self.batches = 0
+        self.submitted = 0
+        self.processed = 0
+
+    async def submit(self, order_id: uuid.UUID) -> bool:
+        future: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(order_id, []).append(future)
+        self.submitted += 1
+        if len(self._pending) >= self._batch_size:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._linger, self._flush_now)
+        return await future
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def drain(self) -> None:
+        self._flush_now()
+        await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    async def _flush(self, batch: dict[uuid.UUID, list[asyncio.Future[bool]]]) -> None:
+        started = time.perf_counter()
+        try:
+            async with self._session_factory() as session:
+                orders = await order_service.process_orders(OrderRepository(session), list(batch))
+                await session.commit()
+            # only after the commit: a reader refilling the cache must see the new status
+            await order_service.invalidate_orders_cache(orders)
+            await publish_order_statuses(orders)
+        except Exception as e:
+            logger.error('order batch failed', orders=len(batch))
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        moved = {order.id for order in orders}
+        for order_id, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(order_id in moved)
+        elapsed = time.perf_counter() - started
+        self.batches += 1
+        self.processed += len(moved)
+        logger.info(
+            'order batch processed',
+            orders=len(batch),
+            moved=len(moved),
+            elapsed_ms=round(elapsed * 1000, 1),
+            orders_per_second=round(len(batch) / elapsed) if elapsed else None,
+            total_processed=self.processed,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "pending": len(self._pending),
+        }
+
+
+def get_order_processor() -> OrderBatchProcessor:
+    global _processor
+    if _processor is None:
+        _processor = OrderBatchProcessor(
+            async_session_factory,
+            batch_size=settings.order_processing_batch_size,
+            linger=settings.order_processing_linger_ms / 1000,
+        )
+    return _processor
@@ -1,12 +1,29 @@
-import asyncio
+import uuid
 
 import structlog
+from taskiq import TaskiqEvents, TaskiqState
+
+from app.core.config import settings
 from app.tasks.broker import broker
+from app.tasks.order_processor import get_order_processor
 
 logger = structlog.get_logger(__name__)
 
 
-@broker.task
+# the Kafka offset is committed once the task is enqueued, so a failed batch has to be retried
+# here or its orders stay PENDING
+@broker.task(retry_on_error=True, max_retries=settings.order_processing_max_retries)
 async def process_order_task(order_id: str) -> None:
-    await asyncio.sleep(2)
-    logger.info("order_processed", order_id=order_id)
+    try:
+        order_uuid = uuid.UUID(order_id)
+    except ValueError:
+        logger.warning("invalid_order_id", order_id=order_id)
+        return
+    # batched with the other tasks running in this worker; a redelivered task is a no-op
+    moved = await get_order_processor().submit(order_uuid)
+    logger.info("order_processed" if moved else "order_already_processed", order_id=order_id)
+
+
+@broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
+async def drain_order_processor(state: TaskiqState) -> None:
+    await get_order_processor().drain()
@@ -0,0 +1,48 @@
+import time
+from collections import deque
+
+import structlog
+from redis import Redis as SyncRedis
+
+from app.cache.client import get_redis
+from app.core.config import settings
+
+logger = structlog.get_logger(__name__)
+
+
+async def get_queue_depth() -> int | None:
+    try:
+        return await get_redis().llen(settings.taskiq_queue_name)
+    except Exception:
+        logger.error("error reading task queue depth", queue=settings.taskiq_queue_name)
+        return None
+
+
+class QueueDepthMonitor:
+    # Samples the length of the taskiq list (tasks enqueued and not yet taken by a worker) and
+    # keeps the last `window` samples, so the caller also sees how fast the backlog moves:
+    # a negative rate is the queue draining, and depth / -rate the seconds left to empty it.
+    def __init__(self, redis: SyncRedis, queue_name: str, window: int = 10) -> None:
+        self._redis = redis
+        self._queue_name = queue_name
+        self._samples: deque[tuple[float, int]] = deque(maxlen=window)
+
+    def sample(self) -> int | None:
+        try:
+            depth = self._redis.llen(self._queue_name)
+        except Exception:
+            logger.error("error reading task queue depth", queue=self._queue_name)
+            return None
+        self._samples.append((time.monotonic(), depth))
+        return depth
+
+    def stats(self) -> dict:
+        if not self._samples:
+            return {"depth": None, "rate_per_second": None, "drain_eta_seconds": None}
+        (first_at, first_depth), (last_at, depth) = self._samples[0], self._samples[-1]
+        rate = (depth - first_depth) / (last_at - first_at) if last_at > first_at else None
+        return {
+            "depth": depth,
+            "rate_per_second": round(rate, 1) if rate is not None else None,
+            "drain_eta_seconds": round(depth / -rate, 1) if rate is not None and rate < 0 else None,
+        }
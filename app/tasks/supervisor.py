@@ -0,0 +1,147 @@
+import math
+import signal
+import time
+
+import structlog
+from redis import Redis as SyncRedis
+from taskiq.cli.worker.args import WorkerArgs
+from taskiq.cli.worker.run import start_listen
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.core.supervision import ProcessGroup
+from app.tasks.queue_depth import QueueDepthMonitor
+
+# a worker stops waiting for its tasks after shutdown_timeout and only then runs its
+# WORKER_SHUTDOWN hooks (the order processor's final drain); they get this long before SIGKILL
+SHUTDOWN_HOOKS_GRACE = 5.0
+
+logger = structlog.get_logger(__name__)
+
+
+def target_processes(depth: int, min_processes: int, max_processes: int, backlog_per_process: int) -> int:
+    return max(min_processes, min(max_processes, math.ceil(depth / backlog_per_process)))
+
+
+def run_worker(max_async_tasks: int, max_prefetch: int, shutdown_timeout: float) -> None:
+    # one taskiq worker in this process; SIGTERM stops it fetching, lets the running tasks
+    # finish (the order processor drains its batch on WORKER_SHUTDOWN) and exits
+    start_listen(
+        WorkerArgs(
+            broker="app.tasks.broker:broker",
+            modules=["app.tasks"],
+            workers=1,
+            max_async_tasks=max_async_tasks,
+            max_prefetch=max_prefetch,
+            wait_tasks_timeout=shutdown_timeout,
+            configure_logging=False,
+        )
+    )
+
+
+class WorkerSupervisor:
+    # Runs between min_processes and max_processes taskiq workers on the same Redis list,
+    # sized by its length every interval seconds. Scaling up is immediate; scaling down retires
+    # one worker at a time, each only after the backlog has needed fewer workers for
+    # scale_down_delay seconds, so a burst that comes in waves doesn't make them flap. Crashed
+    # workers are restarted with backoff; on SIGTERM/SIGINT every worker gets SIGTERM and is
+    # killed only SHUTDOWN_HOOKS_GRACE after shutdown_timeout.
+    def __init__(
+        self,
+        monitor: QueueDepthMonitor,
+        min_processes: int,
+        max_processes: int,
+        scale_up_backlog: int,
+        scale_down_delay: float,
+        interval: float,
+        max_async_tasks: int,
+        max_prefetch: int,
+        shutdown_timeout: float,
+    ) -> None:
+        self._monitor = monitor
+        self._min_processes = min_processes
+        self._max_processes = max(max_processes, min_processes)
+        self._scale_up_backlog = scale_up_backlog
+        self._scale_down_delay = scale_down_delay
+        self._interval = interval
+        self._group = ProcessGroup(
+            "worker",
+            "taskiq-worker",
+            run_worker,
+            (max_async_tasks, max_prefetch, shutdown_timeout),
+            kill_after=shutdown_timeout + SHUTDOWN_HOOKS_GRACE,
+        )
+        self._low_since: float | None = None
+        self._stopping = False
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        self._scale_to(self._min_processes)
+        logger.info(
+            "worker_supervisor_started",
+            min_processes=self._min_processes,
+            max_processes=self._max_processes,
+        )
+        try:
+            while not self._stopping:
+                now = time.monotonic()
+                self._group.restart_exited(now)
+                self._group.reap_retired(now)
+                depth = self._monitor.sample()
+                if depth is not None:
+                    self.scale(depth, now)
+                time.sleep(self._interval)
+        finally:
+            self._group.stop()
+            logger.info("worker_supervisor_stopped")
+
+    def scale(self, depth: int, now: float) -> None:
+        current = self.processes
+        target = target_processes(depth, self._min_processes, self._max_processes, self._scale_up_backlog)
+        if target > current:
+            self._low_since = None
+            logger.info("workers_scaling_up", processes=target, **self._monitor.stats())
+            self._scale_to(target)
+        elif target < current:
+            if self._low_since is None:
+                self._low_since = now
+            elif now - self._low_since >= self._scale_down_delay:
+                self._low_since = now
+                logger.info("workers_scaling_down", processes=current - 1, **self._monitor.stats())
+                self._scale_to(current - 1)
+        else:
+            self._low_since = None
+
+    @property
+    def processes(self) -> int:
+        return len(self._group.children)
+
+    def _scale_to(self, processes: int) -> None:
+        while self.processes < processes:
+            self._group.start(self.processes)
+        while self.processes > processes:
+            self._group.retire(self.processes - 1)
+
+    def _request_stop(self, signum: int, frame) -> None:
+        self._stopping = True
+
+
+def main() -> None:
+    setup_logging(log_level=settings.log_level)
+    monitor = QueueDepthMonitor(SyncRedis.from_url(settings.redis_url), settings.taskiq_queue_name)
+    WorkerSupervisor(
+        monitor,
+        min_processes=settings.taskiq_worker_min_processes,
+        max_processes=settings.taskiq_worker_max_processes,
+        scale_up_backlog=settings.taskiq_worker_scale_up_backlog,
+        scale_down_delay=settings.taskiq_worker_scale_down_delay,
+        interval=settings.taskiq_worker_scale_interval,
+        max_async_tasks=settings.taskiq_worker_max_async_tasks,
+        max_prefetch=settings.taskiq_worker_max_prefetch,
+        shutdown_timeout=settings.taskiq_worker_shutdown_timeout,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
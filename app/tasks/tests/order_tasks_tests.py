@@ -0,0 +1,141 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from taskiq import InMemoryBroker, SimpleRetryMiddleware
+
+from app.db.models import Order, OrderStatus, User
+from app.services import order_service
+from app.tasks import order_tasks
+from app.tasks.order_processor import OrderBatchProcessor
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def session_factory(db_engine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+async def orders(session_factory) -> list[Order]:
+    async with session_factory() as session, session.begin():
+        user = User(email="worker@example.com", password="x")
+        session.add(user)
+        await session.flush()
+        orders = [Order(user_id=user.id, items=[], total_price=1.0) for _ in range(5)]
+        orders[-1].status = OrderStatus.CANCELED
+        session.add_all(orders)
+    return orders
+
+
+@pytest.fixture
+def processor(session_factory):
+    processor = OrderBatchProcessor(session_factory, batch_size=100, linger=0.01)
+    with (
+        patch("app.tasks.order_tasks.get_order_processor", return_value=processor),
+        patch("app.services.order_service.invalidate_cache_many", new_callable=AsyncMock) as invalidate,
+        patch("app.tasks.order_processor.publish_order_statuses", new_callable=AsyncMock) as publish,
+    ):
+        processor.invalidate = invalidate
+        processor.publish = publish
+        yield processor
+
+
+@pytest.fixture
+async def broker():
+    broker = InMemoryBroker().with_middlewares(SimpleRetryMiddleware())
+    await broker.startup()
+    yield broker
+    await broker.shutdown()
+
+
+async def statuses(session_factory, orders: list[Order]) -> list[tuple[str, int]]:
+    async with session_factory() as session:
+        result = await session.execute(
+            select(Order.id, Order.status, Order.version).where(Order.id.in_([o.id for o in orders]))
+        )
+        by_id = {order_id: (status, version) for order_id, status, version in result}
+    return [by_id[order.id] for order in orders]
+
+
+async def test_concurrent_tasks_are_processed_in_one_update(broker, processor, orders, session_factory, db_engine):
+    task = broker.register_task(order_tasks.process_order_task.original_func, task_name="process_order_task")
+    updates = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            updates.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        sent = await asyncio.gather(*(task.kiq(str(order.id)) for order in orders))
+        results = await asyncio.gather(*(s.wait_result(timeout=5) for s in sent))
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+
+    assert not any(result.is_err for result in results)
+    assert len(updates) == 1
+    assert "= ANY" in updates[0]
+    assert await statuses(session_factory, orders) == [("PAID", 2)] * 4 + [("CANCELED", 1)]
+    assert processor.stats() == {"batches": 1, "submitted": 5, "processed": 4, "pending": 0}
+
+    invalidated = processor.invalidate.await_args.args[0]
+    assert {f"{order_service.ORDER_CACHE_KEY_PREFIX}{order.id}" for order in orders[:4]} <= set(invalidated)
+    assert f"{order_service.ORDER_CACHE_KEY_PREFIX}{orders[4].id}" not in invalidated
+    assert {order.id for order in processor.publish.await_args.args[0]} == {order.id for order in orders[:4]}
+
+
+async def test_redelivered_tasks_change_nothing(broker, processor, orders, session_factory):
+    task = broker.register_task(order_tasks.process_order_task.original_func, task_name="process_order_task")
+    await (await task.kiq(str(orders[0].id))).wait_result(timeout=5)
+
+    assert await processor.submit(orders[0].id) is False
+    assert await processor.submit(uuid.uuid4()) is False
+    assert await statuses(session_factory, orders[:1]) == [("PAID", 2)]
+    assert processor.stats()["processed"] == 1
+
+
+async def test_invalid_order_id_is_skipped(broker, processor):
+    task = broker.register_task(order_tasks.process_order_task.original_func, task_name="process_order_task")
+
+    result = await (await task.kiq("not-a-uuid")).wait_result(timeout=5)
+
+    assert not result.is_err
+    assert processor.stats()["submitted"] == 0
+
+
+async def test_failed_batch_fails_every_task_in_it(processor, orders):
+    with patch("app.services.order_service.process_orders", side_effect=ConnectionError("db down")):
+        results = await asyncio.gather(*(processor.submit(order.id) for order in orders[:3]), return_exceptions=True)
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+    processor.invalidate.assert_not_awaited()
+
+
+async def test_tasks_of_a_failed_batch_are_retried(broker, processor, orders, session_factory):
+    task = broker.register_task(
+        order_tasks.process_order_task.original_func,
+        task_name="process_order_task",
+        **order_tasks.process_order_task.labels,
+    )
+    process_orders = order_service.process_orders
+    calls = 0
+
+    async def fail_once(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ConnectionError("db down")
+        return await process_orders(*args, **kwargs)
+
+    with patch("app.services.order_service.process_orders", side_effect=fail_once):
+        sent = await asyncio.gather(*(task.kiq(str(order.id)) for order in orders[:3]))
+        results = await asyncio.gather(*(s.wait_result(timeout=5) for s in sent))
+
+    assert not any(result.is_err for result in results)
+    assert calls == 2
+    assert await statuses(session_factory, orders[:3]) == [("PAID", 2)] * 3
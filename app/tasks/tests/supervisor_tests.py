@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.tasks.queue_depth import QueueDepthMonitor
+from app.tasks.supervisor import SHUTDOWN_HOOKS_GRACE, WorkerSupervisor, target_processes
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeRedis:
+    def __init__(self, depths: list[int]) -> None:
+        self.depths = depths
+
+    def llen(self, name: str) -> int:
+        return self.depths.pop(0)
+
+
+class FailingRedis:
+    def llen(self, name: str) -> int:
+        raise ConnectionError
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = WorkerSupervisor(
+        QueueDepthMonitor(FakeRedis([]), "taskiq"),
+        min_processes=1,
+        max_processes=4,
+        scale_up_backlog=100,
+        scale_down_delay=30,
+        interval=1,
+        max_async_tasks=200,
+        max_prefetch=0,
+        shutdown_timeout=5,
+    )
+    # slots stand in for worker processes
+    group = supervisor._group
+    with (
+        patch.object(group, "start", side_effect=lambda slot: group.children.__setitem__(slot, object())),
+        patch.object(group, "retire", side_effect=lambda slot: group.children.pop(slot)),
+    ):
+        supervisor._scale_to(1)
+        yield supervisor
+
+
+async def test_target_processes_follows_backlog_within_bounds():
+    assert target_processes(0, 1, 4, 100) == 1
+    assert target_processes(100, 1, 4, 100) == 1
+    assert target_processes(101, 1, 4, 100) == 2
+    assert target_processes(350, 1, 4, 100) == 4
+    assert target_processes(100_000, 1, 4, 100) == 4
+    assert target_processes(0, 2, 4, 100) == 2
+
+
+async def test_scales_up_at_once(supervisor):
+    supervisor.scale(depth=250, now=0)
+
+    assert supervisor.processes == 3
+
+
+async def test_scales_down_one_worker_per_delay(supervisor):
+    supervisor.scale(depth=1000, now=0)
+    assert supervisor.processes == 4
+
+    supervisor.scale(depth=0, now=1)
+    supervisor.scale(depth=0, now=20)
+    assert supervisor.processes == 4
+
+    supervisor.scale(depth=0, now=31)
+    assert supervisor.processes == 3
+    supervisor.scale(depth=0, now=40)
+    assert supervisor.processes == 3
+    supervisor.scale(depth=0, now=61)
+    assert supervisor.processes == 2
+
+
+async def test_backlog_returning_resets_scale_down(supervisor):
+    supervisor.scale(depth=400, now=0)
+    supervisor.scale(depth=0, now=1)
+    supervisor.scale(depth=400, now=20)
+    supervisor.scale(depth=0, now=35)
+
+    assert supervisor.processes == 4
+
+
+async def test_retired_worker_outlives_its_task_wait():
+    class FakeProcess:
+        pid = 1
+
+        def is_alive(self) -> bool:
+            return True
+
+        def terminate(self) -> None:
+            pass
+
+    supervisor = WorkerSupervisor(
+        QueueDepthMonitor(FakeRedis([]), "taskiq"),
+        min_processes=1,
+        max_processes=4,
+        scale_up_backlog=100,
+        scale_down_delay=30,
+        interval=1,
+        max_async_tasks=200,
+        max_prefetch=0,
+        shutdown_timeout=5,
+    )
+    child = FakeProcess()
+    supervisor._group.children[0] = child
+    with patch("app.core.supervision.time.monotonic", return_value=100.0):
+        supervisor._scale_to(0)
+
+    # the worker stops waiting for tasks at 105 and still has to run its shutdown hooks
+    assert supervisor._group.retiring[child] == 105.0 + SHUTDOWN_HOOKS_GRACE
+
+
+async def test_monitor_reports_drain_rate():
+    monitor = QueueDepthMonitor(FakeRedis([1000, 600]), "taskiq")
+    with patch("app.tasks.queue_depth.time.monotonic", side_effect=[0.0, 2.0]):
+        assert monitor.sample() == 1000
+        assert monitor.sample() == 600
+
+    assert monitor.stats() == {"depth": 600, "rate_per_second": -200.0, "drain_eta_seconds": 3.0}
+
+
+async def test_monitor_fails_soft():
+    monitor = QueueDepthMonitor(FailingRedis(), "taskiq")
+
+    assert monitor.sample() is None
+    assert monitor.stats()["depth"] is None
@@ -0,0 +1,72 @@
+"""Order ingest throughput: one POST /orders/ per order vs. POST /orders/bulk/.
+
+    python -m benchmarks.bulk_orders --orders 2000 --batch-size 500
+
+Runs the API in-process against a migrated DATABASE_URL; Kafka is not needed.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core.limiter import limiter
+from app.main import app
+
+ORDER = {"items": [{"name": "item", "quantity": 2, "price": 4.5}]}
+
+
+async def auth_headers(client: AsyncClient) -> dict:
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    await client.post("/register/", json={"email": email, "password": "bench-password"})
+    resp = await client.post("/token/", data={"username": email, "password": "bench-password"})
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+async def bench_single(client: AsyncClient, headers: dict, orders: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create() -> None:
+        async with semaphore:
+            resp = await client.post("/orders/", json=ORDER, headers=headers)
+            resp.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(create() for _ in range(orders)))
+    return orders / (time.perf_counter() - started)
+
+
+async def bench_bulk(client: AsyncClient, headers: dict, orders: int, batch_size: int) -> float:
+    started = time.perf_counter()
+    for offset in range(0, orders, batch_size):
+        count = min(batch_size, orders - offset)
+        resp = await client.post("/orders/bulk/", json={"orders": [ORDER] * count}, headers=headers)
+        resp.raise_for_status()
+    return orders / (time.perf_counter() - started)
+
+
+async def run(orders: int, batch_size: int, concurrency: int) -> None:
+    limiter.enabled = False
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        headers = await auth_headers(client)
+        single = await bench_single(client, headers, orders, concurrency)
+        bulk = await bench_bulk(client, headers, orders, batch_size)
+
+    print(f"{'mode':<36} {'orders/s':>10}")
+    print(f"{f'POST /orders/ x{orders} (concurrency {concurrency})':<36} {single:>10.0f}")
+    print(f"{f'POST /orders/bulk/ ({batch_size} per call)':<36} {bulk:>10.0f}")
+    print(f"speedup: {bulk / single:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=2_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.orders, args.batch_size, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
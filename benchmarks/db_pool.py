@@ -0,0 +1,81 @@
+"""Connection pool and prepared-statement cache settings under concurrent order reads.
+
+    python -m benchmarks.db_pool --requests 5000 --concurrency 100
+
+Runs the order-by-id query through engines built by app.db.pool.engine_options against
+DATABASE_URL, one configuration per row: pool size, pre-ping, statement cache on/off and
+PgBouncer mode. Reports throughput, p50/p99 latency and the pool's checkout wait.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.db.models import Order
+from app.db.pool import CheckoutStats, engine_options
+
+CONFIGS = {
+    "pool 5, pre-ping (old default)": {"db_pool_size": 5, "db_max_overflow": 10, "db_pool_pre_ping": True},
+    "pool 20": {},
+    "pool 20, pre-ping": {"db_pool_pre_ping": True},
+    "pool 20, no statement cache": {"db_statement_cache_size": 0},
+    "pool 20, pgbouncer mode": {"db_pgbouncer": True},
+}
+
+
+async def bench(name: str, overrides: dict, order_ids: list, requests: int, concurrency: int) -> None:
+    config = settings.model_copy(update=overrides)
+    engine = create_async_engine(config.database_url, **engine_options(config))
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def read(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            async with AsyncSession(engine) as session:
+                await session.scalar(select(Order).where(Order.id == order_ids[i % len(order_ids)]))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(read(i) for i in range(concurrency)))
+    engine.pool.checkout_stats = CheckoutStats()
+    latencies.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(read(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    stats = engine.pool.stats()
+    print(
+        f"{name:<32} {requests / elapsed:>8.0f} {statistics.median(latencies):>8.2f} "
+        f"{latencies[int(len(latencies) * 0.99)]:>8.2f} {stats['avg_wait_ms']:>10.2f} {stats['max_wait_ms']:>10.2f}"
+    )
+    await engine.dispose()
+
+
+async def run(requests: int, concurrency: int) -> None:
+    engine = create_async_engine(settings.database_url)
+    async with AsyncSession(engine) as session:
+        order_ids = list(await session.scalars(select(Order.id).limit(1000)))
+    await engine.dispose()
+    if not order_ids:
+        raise SystemExit("no orders in DATABASE_URL, create some first")
+
+    print(f"{'config':<32} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'wait avg':>10} {'wait max':>10}")
+    for name, overrides in CONFIGS.items():
+        await bench(name, overrides, order_ids, requests, concurrency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
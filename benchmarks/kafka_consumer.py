@@ -0,0 +1,79 @@
+"""Consumer throughput (msgs/sec) per batch size with a simulated Redis enqueue round trip.
+
+    python -m benchmarks.kafka_consumer --messages 20000 --rtt-ms 1
+
+Feeds pre-built Kafka records through the consumer's decode + enqueue path in batches of each
+size and reports the resulting throughput. Batch size 1 with concurrency 1 is the old
+one-message-at-a-time behaviour. Records are keyed by user; events of one user are enqueued
+in order, so concurrency within a batch is bounded by the number of distinct users in it.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from aiokafka import ConsumerRecord
+
+from app.kafka.consumer import decode_order_lanes, enqueue_order_tasks
+
+BATCH_SIZES = (1, 10, 100, 500, 1000)
+
+
+def make_records(count: int, users: int) -> list[ConsumerRecord]:
+    records = []
+    for offset in range(count):
+        user_id = offset % users
+        value = json.dumps({"order_id": str(uuid.uuid4()), "user_id": user_id}).encode("utf-8")
+        records.append(
+            ConsumerRecord(
+                topic="new_order",
+                partition=0,
+                offset=offset,
+                timestamp=0,
+                timestamp_type=0,
+                key=str(user_id).encode("utf-8"),
+                value=value,
+                checksum=None,
+                serialized_key_size=0,
+                serialized_value_size=len(value),
+                headers=(),
+            )
+        )
+    return records
+
+
+async def bench(records: list[ConsumerRecord], batch_size: int, concurrency: int, rtt: float) -> float:
+    async def enqueue(order_id: str) -> None:
+        await asyncio.sleep(rtt)
+
+    started = time.perf_counter()
+    for i in range(0, len(records), batch_size):
+        lanes = decode_order_lanes(records[i : i + batch_size])
+        await enqueue_order_tasks(lanes, concurrency, enqueue=enqueue)
+    return len(records) / (time.perf_counter() - started)
+
+
+async def run(messages: int, users: int, rtt_ms: float, concurrency: int) -> None:
+    records = make_records(messages, users)
+    rtt = rtt_ms / 1000
+    baseline = await bench(records[: max(messages // 20, 1)], 1, 1, rtt)
+    print(f"{'batch size':>10} {'concurrency':>12} {'msgs/s':>10} {'speedup':>8}")
+    print(f"{1:>10} {1:>12} {baseline:>10.0f} {1:>7.1f}x")
+    for batch_size in BATCH_SIZES:
+        throughput = await bench(records, batch_size, concurrency, rtt)
+        print(f"{batch_size:>10} {concurrency:>12} {throughput:>10.0f} {throughput / baseline:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.users, args.rtt_ms, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
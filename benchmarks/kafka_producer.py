@@ -0,0 +1,165 @@
+"""Producer throughput against a stub broker: send_and_wait per message vs. BufferedPublisher.
+
+    python -m benchmarks.kafka_producer --messages 50000 --rtt-ms 2
+
+The stub broker acks each produce request after --rtt-ms and batches like aiokafka does
+(flush on linger_ms or when max_batch_size bytes are queued), so the numbers show the effect
+of batching and the in-flight buffer without a real Kafka cluster.
+"""
+import argparse
+import asyncio
+import gzip
+import statistics
+import time
+import uuid
+
+from app.kafka.producer import BufferedPublisher, build_new_order_event, encode_event
+
+TOPIC = "new_order"
+
+
+class StubBrokerProducer:
+    def __init__(self, rtt_ms: float, linger_ms: float, max_batch_size: int) -> None:
+        self._rtt = rtt_ms / 1000
+        self._linger = linger_ms / 1000
+        self._max_batch_size = max_batch_size
+        self._batch: list[tuple[asyncio.Future, bytes]] = []
+        self._batch_bytes = 0
+        self._linger_timer: asyncio.TimerHandle | None = None
+        self._shipping: set[asyncio.Task] = set()
+        self.requests = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+
+    async def send(self, topic: str, value: bytes, key: bytes | None = None) -> asyncio.Future:
+        delivery = asyncio.get_running_loop().create_future()
+        self._batch.append((delivery, value))
+        self._batch_bytes += len(value)
+        if self._batch_bytes >= self._max_batch_size or not self._linger:
+            self._drain()
+        elif self._linger_timer is None:
+            self._linger_timer = asyncio.get_running_loop().call_later(self._linger, self._drain)
+        return delivery
+
+    async def send_and_wait(self, topic: str, value: bytes, key: bytes | None = None) -> None:
+        return await (await self.send(topic, value, key))
+
+    async def wait_idle(self) -> None:
+        self._drain()
+        while self._shipping:
+            await asyncio.gather(*self._shipping)
+
+    def _drain(self) -> None:
+        if self._linger_timer is not None:
+            self._linger_timer.cancel()
+            self._linger_timer = None
+        if not self._batch:
+            return
+        batch, self._batch, self._batch_bytes = self._batch, [], 0
+        task = asyncio.get_running_loop().create_task(self._ship(batch))
+        self._shipping.add(task)
+        task.add_done_callback(self._shipping.discard)
+
+    async def _ship(self, batch: list[tuple[asyncio.Future, bytes]]) -> None:
+        payload = b"".join(value for _, value in batch)
+        self.requests += 1
+        self.raw_bytes += len(payload)
+        self.compressed_bytes += len(gzip.compress(payload))
+        await asyncio.sleep(self._rtt)
+        for delivery, _ in batch:
+            if not delivery.done():
+                delivery.set_result(None)
+
+
+def make_messages(count: int, users: int) -> list[tuple[bytes, bytes]]:
+    return [
+        (
+            encode_event(build_new_order_event(uuid.uuid4(), i % users)),
+            str(i % users).encode("utf-8"),
+        )
+        for i in range(count)
+    ]
+
+
+def summarize(name: str, enqueue_ms: list[float], elapsed: float, producer: StubBrokerProducer) -> dict:
+    enqueue_ms.sort()
+    return {
+        "name": name,
+        "msgs_per_sec": len(enqueue_ms) / elapsed,
+        "enqueue_p50_ms": statistics.median(enqueue_ms),
+        "enqueue_p99_ms": enqueue_ms[min(len(enqueue_ms) - 1, int(len(enqueue_ms) * 0.99))],
+        "requests": producer.requests,
+        "compression_ratio": producer.raw_bytes / max(producer.compressed_bytes, 1),
+    }
+
+
+async def bench_send_and_wait(messages: list[tuple[bytes, bytes]], rtt_ms: float) -> dict:
+    producer = StubBrokerProducer(rtt_ms=rtt_ms, linger_ms=0, max_batch_size=16 * 1024)
+    enqueue_ms = []
+    started = time.perf_counter()
+    for value, key in messages:
+        sent = time.perf_counter()
+        await producer.send_and_wait(TOPIC, value=value, key=key)
+        enqueue_ms.append((time.perf_counter() - sent) * 1000)
+    return summarize("send_and_wait", enqueue_ms, time.perf_counter() - started, producer)
+
+
+async def bench_buffered(
+    messages: list[tuple[bytes, bytes]],
+    rtt_ms: float,
+    linger_ms: float,
+    max_batch_size: int,
+    max_in_flight: int,
+) -> dict:
+    producer = StubBrokerProducer(rtt_ms=rtt_ms, linger_ms=linger_ms, max_batch_size=max_batch_size)
+    publisher = BufferedPublisher(producer, max_in_flight=max_in_flight)
+    failures = 0
+
+    def on_delivery(metadata, error) -> None:
+        nonlocal failures
+        failures += error is not None
+
+    enqueue_ms = []
+    started = time.perf_counter()
+    for value, key in messages:
+        sent = time.perf_counter()
+        await publisher.publish(TOPIC, value=value, key=key, on_delivery=on_delivery)
+        enqueue_ms.append((time.perf_counter() - sent) * 1000)
+    await producer.wait_idle()
+    await publisher.flush()
+    assert failures == 0
+    name = f"buffered linger={linger_ms:g}ms in_flight={max_in_flight}"
+    return summarize(name, enqueue_ms, time.perf_counter() - started, producer)
+
+
+async def run(args: argparse.Namespace) -> None:
+    messages = make_messages(args.messages, args.users)
+    # one round trip per message: a tenth of the messages is plenty to get its rate
+    results = [await bench_send_and_wait(messages[: args.messages // 10], args.rtt_ms)]
+    for linger_ms in (0, 5, 20):
+        results.append(
+            await bench_buffered(
+                messages, args.rtt_ms, linger_ms, args.max_batch_size, args.max_in_flight
+            )
+        )
+
+    print(f"{'mode':<40} {'msgs/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'requests':>9} {'gzip':>6}")
+    for r in results:
+        print(
+            f"{r['name']:<40} {r['msgs_per_sec']:>10.0f} {r['enqueue_p50_ms']:>8.3f} "
+            f"{r['enqueue_p99_ms']:>8.3f} {r['requests']:>9} {r['compression_ratio']:>5.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch-size", type=int, default=64 * 1024)
+    parser.add_argument("--max-in-flight", type=int, default=10_000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Order read latency while a login storm is running, with bcrypt inline vs. in the pool.
+
+    python -m benchmarks.login_storm --readers 20 --logins 6 --duration 10
+
+Runs the API in-process against a migrated DATABASE_URL; Kafka is not needed.
+Each login keeps its DB connection while bcrypt runs, so keep --logins below the pool size
+or the readers end up measuring pool starvation instead of event loop stalls.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from unittest.mock import patch
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core.limiter import limiter
+from app.core.security import get_password_hash, verify_password
+from app.main import app
+
+PASSWORD = "bench-password"
+
+
+async def _inline_hash(password: str) -> str:
+    return get_password_hash(password)
+
+
+async def _inline_verify(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def setup_user(client: AsyncClient) -> tuple[dict, str, str]:
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    await client.post("/register/", json={"email": email, "password": PASSWORD})
+    resp = await client.post("/token/", data={"username": email, "password": PASSWORD})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    resp = await client.post(
+        "/orders/",
+        json={"items": [{"name": "item", "quantity": 1, "price": 1.0}]},
+        headers=headers,
+    )
+    return headers, email, resp.json()["id"]
+
+
+async def run_scenario(
+    client: AsyncClient,
+    headers: dict,
+    email: str,
+    order_id: str,
+    readers: int,
+    logins: int,
+    duration: float,
+) -> dict:
+    read_latencies: list[float] = []
+    login_count = 0
+    deadline = time.perf_counter() + duration
+
+    async def reader() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await client.get(f"/orders/{order_id}/", headers=headers)
+            read_latencies.append((time.perf_counter() - started) * 1000)
+
+    async def login() -> None:
+        nonlocal login_count
+        while time.perf_counter() < deadline:
+            await client.post("/token/", data={"username": email, "password": PASSWORD})
+            login_count += 1
+
+    await asyncio.gather(*(reader() for _ in range(readers)), *(login() for _ in range(logins)))
+    return {
+        "reads": len(read_latencies),
+        "read_p50_ms": statistics.median(read_latencies),
+        "read_p99_ms": percentile(read_latencies, 0.99),
+        "logins_per_sec": login_count / duration,
+    }
+
+
+async def run(readers: int, logins: int, duration: float) -> None:
+    limiter.enabled = False
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        headers, email, order_id = await setup_user(client)
+        results = {
+            "no logins": await run_scenario(client, headers, email, order_id, readers, 0, duration),
+        }
+        with (
+            patch("app.services.auth_service.get_password_hash_async", _inline_hash),
+            patch("app.services.auth_service.verify_password_async", _inline_verify),
+        ):
+            results["logins, bcrypt inline"] = await run_scenario(
+                client, headers, email, order_id, readers, logins, duration
+            )
+        results["logins, bcrypt pool"] = await run_scenario(
+            client, headers, email, order_id, readers, logins, duration
+        )
+
+    print(f"{'scenario':<24} {'reads':>8} {'p50 ms':>9} {'p99 ms':>9} {'logins/s':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<24} {result['reads']:>8} {result['read_p50_ms']:>9.2f} "
+            f"{result['read_p99_ms']:>9.2f} {result['logins_per_sec']:>9.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.readers, args.logins, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Dashboard load: N orders fetched with one GET /orders/{id}/ each vs. one POST /orders/batch/.
+
+    python -m benchmarks.order_batch --orders 50 --rounds 200
+
+Runs the API in-process against a migrated DATABASE_URL and Redis. Each round is timed warm
+(everything cached) and cold (the orders' Redis entries dropped first); LOCAL_CACHE_TTL=0
+keeps the in-process tier out of the way so every lookup goes to Redis.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from httpx import ASGITransport, AsyncClient
+
+from app.cache.decorators import get_cache
+from app.core.limiter import limiter
+from app.main import app
+from app.services.order_service import ORDER_CACHE_KEY_PREFIX
+
+
+async def auth_headers(client: AsyncClient) -> dict:
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    await client.post("/register/", json={"email": email, "password": "bench-password"})
+    resp = await client.post("/token/", data={"username": email, "password": "bench-password"})
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+async def timed(fetch, before=None, rounds: int = 100) -> float:
+    latencies = []
+    for _ in range(rounds):
+        if before is not None:
+            await before()
+        started = time.perf_counter()
+        await fetch()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.median(latencies)
+
+
+async def run(orders: int, rounds: int) -> None:
+    limiter.enabled = False
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        headers = await auth_headers(client)
+        resp = await client.post("/orders/bulk/", json={"orders": [{"items": []}] * orders}, headers=headers)
+        order_ids = [order["id"] for order in resp.json()]
+
+        async def one_by_one() -> None:
+            for order_id in order_ids:
+                resp = await client.get(f"/orders/{order_id}/", headers=headers)
+                resp.raise_for_status()
+
+        async def batch() -> None:
+            resp = await client.post("/orders/batch/", json={"ids": order_ids}, headers=headers)
+            resp.raise_for_status()
+
+        async def drop_cached() -> None:
+            for order_id in order_ids:
+                await get_cache().delete(f"{ORDER_CACHE_KEY_PREFIX}{order_id}")
+
+        print(f"{orders} orders, p50 ms per dashboard load")
+        print(f"{'mode':<24} {'warm':>8} {'cold':>8}")
+        for name, fetch in (("GET per order", one_by_one), ("POST /orders/batch/", batch)):
+            warm = await timed(fetch, rounds=rounds)
+            cold = await timed(fetch, before=drop_cached, rounds=max(rounds // 10, 5))
+            print(f"{name:<24} {warm:>8.2f} {cold:>8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.orders, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
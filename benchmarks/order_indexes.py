@@ -0,0 +1,157 @@
+"""Seed a large orders table and compare query plans/latencies without and with indexes.
+
+    python -m benchmarks.order_indexes --database-url postgresql+asyncpg://.../orders_bench \
+        --orders 3000000 --users 20000
+
+Drops and recreates the order indexes, so it needs an explicit --database-url pointing at a
+migrated throwaway database, and refuses to run against the application's DATABASE_URL.
+Seeded rows are removed at the end.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.config import settings
+
+BENCH_EMAIL_DOMAIN = "bench.invalid"
+
+INDEX_DDL = {
+    "ix_orders_user_id_created_at_id": (
+        "CREATE INDEX ix_orders_user_id_created_at_id "
+        "ON orders (user_id, created_at DESC, id DESC)"
+    ),
+    "ix_orders_active_created_at": (
+        "CREATE INDEX ix_orders_active_created_at "
+        "ON orders (created_at) WHERE status IN ('PENDING', 'PAID')"
+    ),
+}
+
+QUERIES = {
+    "user_orders_first_page": (
+        "SELECT * FROM orders WHERE user_id = :user_id "
+        "ORDER BY created_at DESC, id DESC LIMIT 51"
+    ),
+    "user_orders_next_page": (
+        "SELECT * FROM orders WHERE user_id = :user_id "
+        "AND (created_at, id) < (now() - interval '30 days', '00000000-0000-0000-0000-000000000000') "
+        "ORDER BY created_at DESC, id DESC LIMIT 51"
+    ),
+    "active_orders_oldest": (
+        "SELECT id FROM orders WHERE status IN ('PENDING', 'PAID') "
+        "ORDER BY created_at LIMIT 100"
+    ),
+}
+
+
+async def seed(conn: AsyncConnection, users: int, orders: int) -> tuple[int, int]:
+    await conn.execute(
+        text(
+            "INSERT INTO users (email, password, created_at) "
+            "SELECT 'bench' || g || '@' || :domain, 'x', now() FROM generate_series(1, :users) g"
+        ),
+        {"users": users, "domain": BENCH_EMAIL_DOMAIN},
+    )
+    row = (
+        await conn.execute(
+            text("SELECT min(id), max(id) FROM users WHERE email LIKE '%@' || :domain"),
+            {"domain": BENCH_EMAIL_DOMAIN},
+        )
+    ).one()
+    first_user, last_user = row
+    # ~10% of orders stay in a non-terminal status, like a steady-state production table
+    await conn.execute(
+        text(
+            "INSERT INTO orders (id, user_id, items, total_price, status, created_at) "
+            "SELECT gen_random_uuid(), :first_user + (g % :users), "
+            "'[{\"name\": \"item\", \"quantity\": 1, \"price\": 9.99}]'::jsonb, 9.99, "
+            "CASE WHEN g % 20 = 0 THEN 'PENDING' WHEN g % 20 = 1 THEN 'PAID' "
+            "WHEN g % 20 < 15 THEN 'SHIPPED' ELSE 'CANCELED' END, "
+            "now() - (g % 525600) * interval '1 minute' "
+            "FROM generate_series(1, :orders) g"
+        ),
+        {"first_user": first_user, "users": users, "orders": orders},
+    )
+    await conn.execute(text("ANALYZE orders"))
+    return first_user, last_user
+
+
+async def measure(conn: AsyncConnection, user_id: int, repeat: int) -> dict[str, dict]:
+    results = {}
+    for name, sql in QUERIES.items():
+        params = {"user_id": user_id} if ":user_id" in sql else {}
+        plan = (
+            await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+        ).scalars().all()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await conn.execute(text(sql), params)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        results[name] = {
+            "plan": plan,
+            "p50_ms": statistics.median(timings),
+            "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        }
+    return results
+
+
+def report(label: str, results: dict[str, dict]) -> None:
+    print(f"\n===== {label} =====")
+    for name, result in results.items():
+        print(f"\n--- {name}: p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms")
+        for line in result["plan"]:
+            print(f"    {line}")
+
+
+async def run(database_url: str, users: int, orders: int, repeat: int) -> None:
+    engine = create_async_engine(database_url, isolation_level="AUTOCOMMIT")
+    try:
+        async with engine.connect() as conn:
+            for name in INDEX_DDL:
+                await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            print(f"seeding {orders} orders for {users} users...")
+            started = time.perf_counter()
+            first_user, _ = await seed(conn, users, orders)
+            print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+            before = await measure(conn, first_user, repeat)
+            for ddl in INDEX_DDL.values():
+                await conn.execute(text(ddl))
+            await conn.execute(text("ANALYZE orders"))
+            after = await measure(conn, first_user, repeat)
+
+            report("before (no indexes)", before)
+            report("after", after)
+            print("\n===== summary (p50 ms) =====")
+            for name in QUERIES:
+                print(f"{name:<28} {before[name]['p50_ms']:>10.2f} -> {after[name]['p50_ms']:>8.2f}")
+
+            await conn.execute(
+                text("DELETE FROM users WHERE email LIKE '%@' || :domain"),
+                {"domain": BENCH_EMAIL_DOMAIN},
+            )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", required=True, help="a throwaway database, never DATABASE_URL")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=3_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    target, app_database = make_url(args.database_url), make_url(settings.database_url)
+    # same server and database, whatever the driver or credentials
+    if (target.host, target.port, target.database) == (app_database.host, app_database.port, app_database.database):
+        parser.error("--database-url is the application's DATABASE_URL; the benchmark drops its indexes")
+    asyncio.run(run(args.database_url, args.users, args.orders, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Order-processing worker throughput: one UPDATE per task vs. micro-batched UPDATE ... = ANY.
+
+    python -m benchmarks.order_processing --orders 5000 --concurrency 100
+
+Creates PENDING orders in DATABASE_URL and runs them through OrderBatchProcessor with
+`concurrency` tasks in flight, the way a taskiq worker with --max-async-tasks would, once per
+batch size. Batch size 1 is the old one-order-per-statement behaviour.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import insert
+
+from app.db.base import async_session_factory, engine
+from app.db.models import Order, User
+from app.tasks.order_processor import OrderBatchProcessor
+
+
+async def create_orders(count: int) -> list[uuid.UUID]:
+    async with async_session_factory() as session, session.begin():
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", password="x")
+        session.add(user)
+        await session.flush()
+        rows = [{"user_id": user.id, "items": [], "total_price": 1.0} for _ in range(count)]
+        result = await session.scalars(insert(Order).returning(Order.id), rows)
+        return list(result)
+
+
+async def bench(batch_size: int, order_ids: list[uuid.UUID], concurrency: int) -> None:
+    processor = OrderBatchProcessor(async_session_factory, batch_size=batch_size, linger=0.005)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def task(order_id: uuid.UUID) -> None:
+        async with semaphore:
+            await processor.submit(order_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(task(order_id) for order_id in order_ids))
+    elapsed = time.perf_counter() - started
+    stats = processor.stats()
+    print(
+        f"{batch_size:>10} {len(order_ids) / elapsed:>12.0f} {stats['batches']:>9} "
+        f"{stats['processed']:>10}"
+    )
+
+
+async def run(orders: int, concurrency: int, batch_sizes: list[int]) -> None:
+    print(f"{'batch size':>10} {'orders/s':>12} {'batches':>9} {'processed':>10}")
+    for batch_size in batch_sizes:
+        await bench(batch_size, await create_orders(orders), concurrency)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 25, 100, 200])
+    args = parser.parse_args()
+    asyncio.run(run(args.orders, args.concurrency, args.batch_sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Cost of serving a cached order: GET /orders/{id}/ end to end, and the cache-hit codec alone.
+
+    python -m benchmarks.order_serialization --items 50 --requests 5000
+
+Runs the API in-process against a migrated DATABASE_URL, once per cache mode (dict, and
+ORDER_CACHE_RENDERED). The order is read once so every measured request is a cache hit
+(in-process cache, or Redis when LOCAL_CACHE_TTL=0). The codec table decodes one cached
+payload and renders the response body: the stdlib json + Pydantic path, orjson on the plain
+dict, and the rendered mode, which only parses the small meta record.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import orjson
+from httpx import ASGITransport, AsyncClient
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.limiter import limiter
+from app.main import app
+from app.schemas.order import OrderResponse
+
+
+async def auth_headers(client: AsyncClient) -> dict:
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    await client.post("/register/", json={"email": email, "password": "bench-password"})
+    resp = await client.post("/token/", data={"username": email, "password": "bench-password"})
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def bench_codec(name: str, fn, payload, rounds: int) -> None:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(payload)
+    print(f"{name:<44} {(time.perf_counter() - started) / rounds * 1_000_000:>8.1f} us")
+
+
+def pydantic_hit(payload: str) -> bytes:
+    # JsonSerializer.loads, model_validate in cached_entity, then FastAPI validating the
+    # returned model against response_model and dumping it
+    adapter = TypeAdapter(OrderResponse)
+    model = OrderResponse.model_validate(json.loads(payload))
+    return adapter.dump_json(adapter.validate_python(model))
+
+
+def orjson_hit(payload: bytes) -> bytes:
+    return orjson.dumps(orjson.loads(payload))
+
+
+def rendered_hit(payload: tuple[bytes, bytes]) -> bytes:
+    body, meta = payload
+    orjson.loads(meta)
+    return body
+
+
+async def run(items: int, requests: int) -> None:
+    limiter.enabled = False
+    order = {"items": [{"name": f"item-{i}", "quantity": i % 5 + 1, "price": 9.99} for i in range(items)]}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        headers = await auth_headers(client)
+        resp = await client.post("/orders/", json=order, headers=headers)
+        order_id = resp.json()["id"]
+        for rendered in (False, True):
+            settings.order_cache_rendered = rendered
+            cached = (await client.get(f"/orders/{order_id}/", headers=headers)).json()
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(requests):
+                sent = time.perf_counter()
+                resp = await client.get(f"/orders/{order_id}/", headers=headers)
+                latencies.append((time.perf_counter() - sent) * 1_000_000)
+            elapsed = time.perf_counter() - started
+            print(
+                f"GET /orders/{{id}}/ cache hit, {'rendered' if rendered else 'dict'} mode, {items} items: "
+                f"{requests / elapsed:.0f} req/s, p50 {statistics.median(latencies):.0f} us, "
+                f"{len(resp.content)} bytes"
+            )
+
+    rounds = max(requests, 1000)
+    meta = orjson.dumps({"user_id": cached["user_id"], "version": cached["version"], "updated_at": cached["updated_at"]})
+    bench_codec("codec: json + Pydantic validate + dump_json", pydantic_hit, json.dumps(cached), rounds)
+    bench_codec("codec: orjson loads + dumps", orjson_hit, orjson.dumps(cached), rounds)
+    bench_codec("codec: rendered bytes + meta record", rendered_hit, (orjson.dumps(cached), meta), rounds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Per-request overhead of the Redis GCRA rate limiter.
+
+    python -m benchmarks.rate_limiter --requests 20000 --concurrency 50
+
+Needs Redis at REDIS_HOST/REDIS_PORT. Compares a bare PING round trip, the GCRA script
+(one EVALSHA), and a sorted-set sliding log (the usual MULTI of ZREMRANGEBYSCORE/ZADD/ZCARD)
+on latency, throughput and Redis memory per limited key. The JWT decode done by the key
+function is measured on its own, since it is the limiter's only CPU cost in the API process.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from redis.asyncio import Redis
+from starlette.requests import Request
+
+from app.cache.client import get_redis
+from app.core.limiter import RedisRateLimiter, rate_limit_key
+from app.core.security import create_access_token
+
+REQUESTS_PER_PERIOD = 100
+PERIOD = 60
+
+
+async def sliding_log_hit(redis: Redis, key: str) -> bool:
+    now = time.time()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zremrangebyscore(key, 0, now - PERIOD)
+        pipe.zadd(key, {uuid.uuid4().hex: now})
+        pipe.zcard(key)
+        pipe.expire(key, PERIOD)
+        _, _, count, _ = await pipe.execute()
+    return count <= REQUESTS_PER_PERIOD
+
+
+async def bench(name: str, call, requests: int, concurrency: int) -> None:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append((time.perf_counter() - started) * 1_000_000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(
+        f"{name:<28} {requests / elapsed:>10.0f} {statistics.median(latencies):>9.0f} "
+        f"{latencies[int(len(latencies) * 0.99)]:>9.0f}"
+    )
+
+
+async def run(requests: int, concurrency: int, users: int) -> None:
+    redis = get_redis()
+    limiter = RedisRateLimiter(key_func=rate_limit_key)
+    prefix = f"bench:ratelimit:{uuid.uuid4().hex[:8]}"
+
+    async def ping(i: int) -> None:
+        await redis.ping()
+
+    async def gcra(i: int) -> None:
+        await limiter.hit(f"{prefix}:gcra:{i % users}", REQUESTS_PER_PERIOD, PERIOD)
+
+    async def sliding_log(i: int) -> None:
+        await sliding_log_hit(redis, f"{prefix}:log:{i % users}")
+
+    print(f"{'mode':<28} {'req/s':>10} {'p50 us':>9} {'p99 us':>9}")
+    await limiter.hit(f"{prefix}:warmup", REQUESTS_PER_PERIOD, PERIOD)
+    await bench("PING (round trip floor)", ping, requests, concurrency)
+    await bench("GCRA script", gcra, requests, concurrency)
+    await bench("sorted-set sliding log", sliding_log, requests, concurrency)
+
+    # GCRA keys expire as soon as the caller is back to a full burst, so take a fresh one
+    await gcra(0)
+    gcra_bytes = await redis.memory_usage(f"{prefix}:gcra:0")
+    log_bytes = await redis.memory_usage(f"{prefix}:log:0")
+    print(f"\nRedis memory per key at {REQUESTS_PER_PERIOD}/{PERIOD}s: GCRA {gcra_bytes} B, sliding log {log_bytes} B")
+
+    token = create_access_token(data={"sub": "1"})
+    scope = {"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())], "client": None}
+    request = Request(scope)
+    started = time.perf_counter()
+    for _ in range(requests):
+        rate_limit_key(request)
+    print(f"key function (JWT decode): {(time.perf_counter() - started) / requests * 1_000_000:.1f} us/request")
+
+    keys = [key async for key in redis.scan_iter(f"{prefix}:*")]
+    if keys:
+        await redis.delete(*keys)
+    await redis.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.users))
+
+
+if __name__ == "__main__":
+    main()
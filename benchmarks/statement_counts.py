@@ -0,0 +1,131 @@
+"""SQL statements issued per request for each order endpoint, checked against a budget.
+
+    python -m benchmarks.statement_counts
+
+Runs the API in-process against a migrated DATABASE_URL and counts the statements the engine
+sends while each request is served. Exits non-zero when an endpoint goes over its budget, so a
+write path that grows a refresh or a read-before-write again shows up as a failure.
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from collections.abc import Awaitable, Callable
+
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy import event
+
+from app.core.limiter import limiter
+from app.db.base import engine
+from app.main import app
+
+ORDER = {"items": [{"name": "item", "quantity": 2, "price": 4.5}]}
+
+# principal and order reads are cached (new orders are primed by the POST), so order GETs
+# normally never reach the database
+BUDGETS = {
+    "POST /register/": 2,
+    "POST /token/": 1,
+    "POST /orders/": 2,
+    "POST /orders/bulk/": 2,
+    "GET /orders/{id}/ (cold)": 1,
+    "GET /orders/{id}/ (warm)": 0,
+    "GET /orders/{id}/ (304)": 0,
+    "PATCH /orders/{id}/": 1,
+    "GET /orders/user/{id}/": 1,
+    "POST /orders/batch/": 1,
+}
+
+
+class StatementCounter:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(" ".join(statement.split())[:80])
+
+    async def measure(self, request: Callable[[], Awaitable[Response]]) -> tuple[Response, list[str]]:
+        self.statements = []
+        resp = await request()
+        if resp.is_error:
+            resp.raise_for_status()
+        return resp, list(self.statements)
+
+
+async def run(verbose: bool) -> int:
+    limiter.enabled = False
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    results: dict[str, list[str]] = {}
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    credentials = {"email": email, "password": "bench-password"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        # first connection runs dialect initialisation queries; keep them out of the counts
+        await client.post("/token/", data={"username": "nobody@bench.invalid", "password": "x"})
+
+        resp, results["POST /register/"] = await counter.measure(
+            lambda: client.post("/register/", json=credentials)
+        )
+        user_id = resp.json()["id"]
+        resp, results["POST /token/"] = await counter.measure(
+            lambda: client.post("/token/", data={"username": email, "password": "bench-password"})
+        )
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        # loads the principal into the cache
+        await client.get(f"/orders/user/{user_id}/", headers=headers)
+
+        resp, results["POST /orders/"] = await counter.measure(
+            lambda: client.post("/orders/", json=ORDER, headers=headers)
+        )
+        order_id = resp.json()["id"]
+        resp, results["POST /orders/bulk/"] = await counter.measure(
+            lambda: client.post("/orders/bulk/", json={"orders": [ORDER] * 10}, headers=headers)
+        )
+        bulk_ids = [order["id"] for order in resp.json()]
+        _, results["GET /orders/{id}/ (cold)"] = await counter.measure(
+            lambda: client.get(f"/orders/{order_id}/", headers=headers)
+        )
+        resp, results["GET /orders/{id}/ (warm)"] = await counter.measure(
+            lambda: client.get(f"/orders/{order_id}/", headers=headers)
+        )
+        etag = resp.headers["etag"]
+        _, results["GET /orders/{id}/ (304)"] = await counter.measure(
+            lambda: client.get(f"/orders/{order_id}/", headers={**headers, "If-None-Match": etag})
+        )
+        _, results["PATCH /orders/{id}/"] = await counter.measure(
+            lambda: client.patch(f"/orders/{order_id}/", json={"status": "PAID"}, headers=headers)
+        )
+        _, results["GET /orders/user/{id}/"] = await counter.measure(
+            lambda: client.get(f"/orders/user/{user_id}/", headers=headers)
+        )
+        # the unknown ids miss the cache, and are looked up together in one query
+        batch = bulk_ids + [str(uuid.uuid4()) for _ in range(5)]
+        _, results["POST /orders/batch/"] = await counter.measure(
+            lambda: client.post("/orders/batch/", json={"ids": batch}, headers=headers)
+        )
+
+    event.remove(engine.sync_engine, "before_cursor_execute", counter)
+    await engine.dispose()
+
+    over_budget = 0
+    print(f"{'endpoint':<28} {'statements':>10} {'budget':>7}")
+    for name, statements in results.items():
+        status = "" if len(statements) <= BUDGETS[name] else "  OVER BUDGET"
+        over_budget += bool(status)
+        print(f"{name:<28} {len(statements):>10} {BUDGETS[name]:>7}{status}")
+        if verbose:
+            for statement in statements:
+                print(f"    {statement}")
+    return 1 if over_budget else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verbose", action="store_true", help="print every counted statement")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.verbose)))
+
+
+if __name__ == "__main__":
+    main()
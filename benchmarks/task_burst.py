@@ -0,0 +1,136 @@
+"""Drain time of a burst of order-processing tasks per worker setup, fixed and autoscaled.
+
+    python -m benchmarks.task_burst --orders 20000 --processes 1 2 4
+
+Needs a migrated DATABASE_URL and Redis. For each setup, creates PENDING orders and enqueues
+one process_order_task per order before any worker runs, the way a Kafka backlog lands on the
+taskiq list, then starts the workers and times until every order is PAID (worker start-up
+included). The autoscaled setup runs `python -m app.tasks.supervisor` from one process up to
+the largest --processes value. Worker processes only help as far as there are CPU cores and
+database capacity for them.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+from sqlalchemy import func, insert, select
+
+from app.core.config import settings
+from app.db.base import async_session_factory, engine
+from app.db.models import Order, OrderStatus, User
+from app.tasks.broker import broker
+from app.tasks.order_tasks import process_order_task
+from app.tasks.supervisor import run_worker
+
+ENQUEUE_CONCURRENCY = 200
+
+
+async def create_orders(count: int) -> tuple[int, list[uuid.UUID]]:
+    async with async_session_factory() as session, session.begin():
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", password="x")
+        session.add(user)
+        await session.flush()
+        rows = [{"user_id": user.id, "items": [], "total_price": 1.0} for _ in range(count)]
+        result = await session.scalars(insert(Order).returning(Order.id), rows)
+        return user.id, list(result)
+
+
+async def enqueue(order_ids: list[uuid.UUID]) -> None:
+    semaphore = asyncio.Semaphore(ENQUEUE_CONCURRENCY)
+
+    async def kick(order_id: uuid.UUID) -> None:
+        async with semaphore:
+            await process_order_task.kiq(str(order_id))
+
+    await asyncio.gather(*(kick(order_id) for order_id in order_ids))
+
+
+async def paid(user_id: int) -> int:
+    async with async_session_factory() as session:
+        query = select(func.count()).where(Order.user_id == user_id, Order.status == OrderStatus.PAID)
+        return await session.scalar(query)
+
+
+async def drain(user_id: int, orders: int, timeout: float) -> float:
+    started = time.perf_counter()
+    while await paid(user_id) < orders:
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError(f"burst not drained in {timeout}s")
+        await asyncio.sleep(0.1)
+    return time.perf_counter() - started
+
+
+def start_fixed(processes: int, max_async_tasks: int, max_prefetch: int) -> list:
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_worker, args=(max_async_tasks, max_prefetch, 10.0))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def stop_fixed(workers: list) -> None:
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        worker.join()
+
+
+def start_autoscaled(max_processes: int, max_async_tasks: int, max_prefetch: int, backlog: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "TASKIQ_WORKER_MIN_PROCESSES": "1",
+        "TASKIQ_WORKER_MAX_PROCESSES": str(max_processes),
+        "TASKIQ_WORKER_SCALE_UP_BACKLOG": str(backlog),
+        "TASKIQ_WORKER_SCALE_INTERVAL": "0.2",
+        "TASKIQ_WORKER_MAX_ASYNC_TASKS": str(max_async_tasks),
+        "TASKIQ_WORKER_MAX_PREFETCH": str(max_prefetch),
+    }
+    return subprocess.Popen([sys.executable, "-m", "app.tasks.supervisor"], env=env)
+
+
+async def run(args: argparse.Namespace) -> None:
+    await broker.startup()
+    print(f"{args.orders} tasks, --max-async-tasks {args.max_async_tasks}, --max-prefetch {args.max_prefetch}")
+    print(f"{'workers':<22} {'drain s':>8} {'tasks/s':>9}")
+    setups = [(f"{processes} fixed", processes) for processes in args.processes]
+    setups.append((f"autoscaled 1..{max(args.processes)}", None))
+    for name, processes in setups:
+        user_id, order_ids = await create_orders(args.orders)
+        await enqueue(order_ids)
+        if processes is None:
+            supervisor = start_autoscaled(max(args.processes), args.max_async_tasks, args.max_prefetch, args.backlog)
+            stop = lambda: (supervisor.terminate(), supervisor.wait())  # noqa: E731
+        else:
+            workers = start_fixed(processes, args.max_async_tasks, args.max_prefetch)
+            stop = lambda: stop_fixed(workers)  # noqa: E731
+        try:
+            elapsed = await drain(user_id, args.orders, args.timeout)
+        finally:
+            stop()
+        print(f"{name:<22} {elapsed:>8.2f} {args.orders / elapsed:>9.0f}")
+    await broker.shutdown()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--max-async-tasks", type=int, default=settings.taskiq_worker_max_async_tasks)
+    parser.add_argument("--max-prefetch", type=int, default=settings.taskiq_worker_max_prefetch)
+    parser.add_argument("--backlog", type=int, default=settings.taskiq_worker_scale_up_backlog)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
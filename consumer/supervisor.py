@@ -0,0 +1,51 @@
+import os
+import signal
+import time
+
+import structlog
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.core.supervision import ProcessGroup
+from app.kafka.consumer import main as consumer_main
+
+POLL_INTERVAL = 0.5
+
+logger = structlog.get_logger(__name__)
+
+
+class ConsumerSupervisor:
+    # Runs N consumer processes in the same group; Kafka spreads the topic's partitions over
+    # them. Crashed consumers are restarted with backoff; on SIGTERM/SIGINT every consumer gets
+    # SIGTERM, finishes and commits its current batch, and is killed only after shutdown_timeout.
+    def __init__(self, processes: int, shutdown_timeout: float) -> None:
+        self._processes = processes
+        self._group = ProcessGroup("consumer", "order-consumer", consumer_main, (), shutdown_timeout)
+        self._stopping = False
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for slot in range(self._processes):
+            self._group.start(slot)
+        logger.info("consumer_supervisor_started", processes=self._processes)
+        try:
+            while not self._stopping:
+                self._group.restart_exited(time.monotonic())
+                time.sleep(POLL_INTERVAL)
+        finally:
+            self._group.stop()
+            logger.info("consumer_supervisor_stopped")
+
+    def _request_stop(self, signum: int, frame) -> None:
+        self._stopping = True
+
+
+def main() -> None:
+    setup_logging(log_level=settings.log_level)
+    processes = settings.kafka_consumer_processes or os.cpu_count() or 1
+    ConsumerSupervisor(processes, settings.kafka_consumer_shutdown_timeout).run()
+
+
+if __name__ == "__main__":
+    main()